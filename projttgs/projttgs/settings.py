@@ -82,6 +82,17 @@ DATABASES = {
     }
 }
 
+# On disk, so every web and worker process sees the same entries: a data
+# change clears the cached problem hash for all of them (see
+# ttgen.models.invalidate_problem_hash). Processes on several hosts need a
+# backend they all reach instead, e.g. DatabaseCache or Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'django_cache'),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -138,3 +149,34 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
+
+# Processes used to build and breed timetable schedules; 1 runs the GA
+# in the request thread.
+TTGEN_WORKERS = 1
+
+# Who runs timetable generation jobs: "thread" (a background thread of
+# the web process) or "command" (the run_generation_jobs command).
+TTGEN_JOB_RUNNER = "thread"
+
+# Where exported timetable PDFs are cached (a directory per version), and
+# how many processes render them; 1 renders them in the request thread.
+# Workers are forked from the web process, so raise it only when that
+# process runs no other threads: single-threaded server workers, and
+# TTGEN_JOB_RUNNER = "command".
+TTGEN_PDF_DIR = os.path.join(BASE_DIR, 'pdf_cache')
+TTGEN_PDF_WORKERS = 1
+
+# Solver engine for generation jobs that don't name one: "ga" or
+# "backtracking" (see ttgen/solvers.py).
+TTGEN_SOLVER_ENGINE = "ga"
+
+# Seconds a generation job may solve for before it returns the best
+# timetable found so far; None runs to completion. A job's POSTed
+# time_limit overrides it.
+TTGEN_TIME_LIMIT = None
+
+# Processes that solve independent parts of the problem (departments
+# sharing no instructors or rooms) side by side; 1 solves them one after
+# another in the job's thread. Workers are forked, so raise it only when
+# jobs run under the run_generation_jobs command.
+TTGEN_COMPONENT_WORKERS = 1
@@ -7,3 +7,6 @@ admin.site.register(MeetingTime)
 admin.site.register(Course)
 admin.site.register(Department)
 admin.site.register(Section)
+admin.site.register(GenerationJob)
+admin.site.register(GeneratedTimetable)
+admin.site.register(ScheduledMeeting)
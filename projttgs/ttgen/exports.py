@@ -0,0 +1,184 @@
+"""
+Machine-readable exports of stored timetables.
+
+Each format is a generator of text chunks over a version's meetings,
+which are read from the database EXPORT_CHUNK_SIZE rows at a time, so an
+export of any size holds only one chunk in memory. Views hand the
+generators to a StreamingHttpResponse.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta, timezone
+
+from . import views
+
+EXPORT_CHUNK_SIZE = 2000
+
+FIELDS = [
+    "version", "section", "department", "course", "course_name", "is_lab",
+    "day", "slot", "start", "end", "duration", "room", "instructor_uid", "instructor",
+]
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def meetings(timetable, sections=(), instructors=(), rooms=()):
+    """A version's meetings, optionally only those of the given sections, instructors or rooms."""
+    qs = timetable.meetings.select_related(
+        'section__department', 'course', 'room', 'instructor', 'meeting_time').order_by('pk')
+    if sections:
+        qs = qs.filter(section__in=sections)
+    if instructors:
+        qs = qs.filter(instructor__in=instructors)
+    if rooms:
+        qs = qs.filter(room__in=rooms)
+    return qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def slot_times(slot, duration=1):
+    """
+    The (start, end) times of ``duration`` slots from ``slot``, read from
+    SLOT_LABELS. Labels are on a 12-hour clock without AM/PM; the day
+    starts at 8:30, so hours before 8 are afternoon.
+    """
+    def parse(label):
+        hour, minute = map(int, label.strip().split(":"))
+        return time(hour + 12 if hour < 8 else hour, minute)
+
+    start = views.SLOT_LABELS[slot].split("-")[0]
+    end = views.SLOT_LABELS[str(int(slot) + duration - 1)].split("-")[1]
+    return parse(start), parse(end)
+
+
+def meeting_row(timetable, meeting):
+    """A meeting as a flat dict of FIELDS; rooms, instructors or times deleted since are blank."""
+    mt, room, instructor = meeting.meeting_time, meeting.room, meeting.instructor
+    start = end = None
+    if mt is not None and mt.time in views.SLOT_LABELS:
+        start, end = slot_times(mt.time, meeting.duration)
+    return {
+        "version": timetable.version,
+        "section": meeting.section_id,
+        "department": meeting.section.department.dept_name,
+        "course": meeting.course_id,
+        "course_name": meeting.course.course_name,
+        "is_lab": meeting.is_lab,
+        "day": mt.day if mt else "",
+        "slot": mt.time if mt else "",
+        "start": start.strftime("%H:%M") if start else "",
+        "end": end.strftime("%H:%M") if end else "",
+        "duration": meeting.duration,
+        "room": room.r_number if room else "",
+        "instructor_uid": instructor.uid if instructor else "",
+        "instructor": instructor.name if instructor else "",
+    }
+
+
+def _chunked(lines):
+    """Join ``lines`` into chunks of EXPORT_CHUNK_SIZE lines."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+class _Echo:
+    """A file whose write() returns what was written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_export(timetable, **filters):
+    writer = csv.DictWriter(_Echo(), FIELDS)
+    rows = (writer.writerow(meeting_row(timetable, m)) for m in meetings(timetable, **filters))
+    yield writer.writeheader()
+    yield from _chunked(rows)
+
+
+def jsonl_export(timetable, **filters):
+    return _chunked(json.dumps(meeting_row(timetable, m)) + "\n"
+                    for m in meetings(timetable, **filters))
+
+
+def _ics_text(value):
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _ics_line(line):
+    """Fold a content line at 75 octets, as RFC 5545 asks."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:  # don't split a character
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def first_week(timetable):
+    """The Monday of the week the version was created, where ICS events start."""
+    created = timetable.created_at.date()
+    return created - timedelta(days=created.weekday())
+
+
+def ics_export(timetable, week_start=None, **filters):
+    """
+    One weekly-recurring VEVENT per meeting, first held in the week of
+    ``week_start`` (default: first_week()). Times are local (floating);
+    meetings whose time has been deleted are left out.
+    """
+    week_start = week_start or first_week(timetable)
+    stamp = timetable.created_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def events():
+        for m in meetings(timetable, **filters):
+            mt = m.meeting_time
+            if mt is None or mt.day not in WEEKDAYS or mt.time not in views.SLOT_LABELS:
+                continue
+            day = week_start + timedelta(days=WEEKDAYS.index(mt.day))
+            start, end = slot_times(mt.time, m.duration)
+            summary = m.course.course_name + (" (Lab)" if m.is_lab else "")
+            description = f"Section {m.section_id}"
+            if m.instructor:
+                description += f", {m.instructor.name}"
+            lines = [
+                "BEGIN:VEVENT",
+                f"UID:ttgen-v{timetable.version}-{m.pk}",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{datetime.combine(day, start):%Y%m%dT%H%M%S}",
+                f"DTEND:{datetime.combine(day, end):%Y%m%dT%H%M%S}",
+                "RRULE:FREQ=WEEKLY",
+                f"SUMMARY:{_ics_text(summary)}",
+                f"DESCRIPTION:{_ics_text(description)}",
+            ]
+            if m.room:
+                lines.append(f"LOCATION:{_ics_text(m.room.r_number)}")
+            lines.append("END:VEVENT")
+            yield "".join(map(_ics_line, lines))
+
+    yield "".join(map(_ics_line, [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//schedulerAI//ttgen//EN",
+        f"X-WR-CALNAME:Timetable v{timetable.version}",
+    ]))
+    yield from _chunked(events())
+    yield _ics_line("END:VCALENDAR")
+
+
+# format (and file extension): (generator, content type)
+FORMATS = {
+    "csv": (csv_export, "text/csv"),
+    "jsonl": (jsonl_export, "application/x-ndjson"),
+    "ics": (ics_export, "text/calendar"),
+}
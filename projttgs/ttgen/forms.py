@@ -6,11 +6,12 @@ from django import forms
 class RoomForm(ModelForm):
     class Meta:
         model = Room
-        fields = ['r_number', 'seating_capacity', 'room_type']
+        fields = ['r_number', 'seating_capacity', 'room_type', 'department']
         labels = {
             "r_number": "Room ID",
             "seating_capacity": "Capacity",
-            "room_type": "Room Type"
+            "room_type": "Room Type",
+            "department": "Department (leave empty for a shared room)"
         }
         widgets = {
             "room_type": forms.Select(choices=[
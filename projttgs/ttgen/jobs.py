@@ -0,0 +1,139 @@
+"""
+Timetable generation jobs.
+
+A GenerationJob row is created per request and run by a local worker:
+either a thread of the web process (settings.TTGEN_JOB_RUNNER =
+"thread", the default) or the ``run_generation_jobs`` management
+command ("command"), which claims queued jobs from the database. Both
+write progress to the row, so the status endpoint only has to read it.
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import solvers, views
+from .models import GenerationJob
+
+# Schedules read the snapshot from the views module, so only one job runs
+# per process at a time.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def start_job(mode=GenerationJob.GENERATE, engine=None, time_limit=None):
+    """
+    Create a job for the current data, solved by ``engine`` (default:
+    solvers.default_engine()) in at most ``time_limit`` seconds (default:
+    settings.TTGEN_TIME_LIMIT). If a timetable was already solved for the
+    same fingerprint the job is done at once; otherwise it is queued and
+    handed to the configured runner.
+    """
+    engine = engine or solvers.default_engine()
+    if time_limit is None:
+        time_limit = getattr(settings, "TTGEN_TIME_LIMIT", None)
+    cached = views.cached_timetable(views.current_fingerprint(engine))
+    if cached is not None:
+        now = timezone.now()
+        return GenerationJob.objects.create(
+            mode=mode, engine=engine, time_limit=time_limit, status=GenerationJob.DONE,
+            timetable=cached,
+            from_cache=True, best_fitness=cached.best_fitness, conflicts=cached.conflicts,
+            started_at=now, finished_at=now)
+
+    job = GenerationJob.objects.create(mode=mode, engine=engine, time_limit=time_limit)
+    if getattr(settings, "TTGEN_JOB_RUNNER", "thread") == "thread":
+        _get_executor().submit(_run_in_thread, job.pk)
+    return job
+
+
+def start_repair():
+    """
+    Queue a repair of the latest timetable after a data change, or do
+    nothing and return None when no timetable has been generated yet.
+    """
+    if views.latest_timetable() is None:
+        return None
+    return start_job(GenerationJob.REPAIR)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(1, thread_name_prefix="ttgen-job")
+        return _executor
+
+
+def _run_in_thread(pk):
+    try:
+        if claim(pk):
+            run_job(pk)
+    finally:
+        close_old_connections()
+
+
+def claim(pk):
+    """Mark a queued job as running; False if another worker got there first."""
+    return GenerationJob.objects.filter(pk=pk, status=GenerationJob.QUEUED).update(
+        status=GenerationJob.RUNNING, started_at=timezone.now()) == 1
+
+
+def claim_next():
+    """Claim the oldest queued job and return its pk, or None."""
+    for pk in GenerationJob.objects.filter(status=GenerationJob.QUEUED) \
+            .order_by('created_at').values_list('pk', flat=True):
+        if claim(pk):
+            return pk
+    return None
+
+
+def run_job(pk):
+    """
+    Run a claimed job, recording progress and the result. A repair job
+    with no timetable to repair runs the job's solver engine instead.
+
+    The job's time limit counts from here. A schedule cut short by it,
+    or a repair that left genes unplaced or in conflict, is stored
+    without a fingerprint, so later jobs solve the data afresh rather
+    than being served a partial result from the cache.
+    """
+    jobs = GenerationJob.objects.filter(pk=pk)
+
+    def report(gen, best):
+        jobs.update(generation=gen, best_fitness=best.get_fitness(),
+                    conflicts=best.get_numb_of_conflicts())
+
+    try:
+        job = jobs.get()
+        deadline = None if job.time_limit is None else time.monotonic() + job.time_limit
+        stopped_by_deadline = partial = False
+        views.data = views.ProblemSnapshot.load()
+        fingerprint = views.fingerprint(views.data.problem_hash, job.engine)
+        timetable = views.cached_timetable(fingerprint)
+        from_cache = timetable is not None
+        if not from_cache:
+            latest = views.latest_timetable()
+            if job.mode == GenerationJob.REPAIR and latest is not None:
+                schedule = views.repair_timetable(latest)
+                partial = bool(schedule.get_numb_of_conflicts() or schedule.get_unplaced())
+            else:
+                warm_start = None
+                if latest is not None and views.WARM_START_FRACTION > 0:
+                    warm_start = views.repair_timetable(latest)
+                solution = solvers.solve(views.data, deadline=deadline, engine=job.engine,
+                                         report=report, warm_start=warm_start)
+                schedule, stopped_by_deadline = solution.schedule, solution.stopped_by_deadline
+                partial = stopped_by_deadline
+            timetable = views.save_timetable(schedule, "" if partial else fingerprint)
+        jobs.update(status=GenerationJob.DONE, timetable=timetable, from_cache=from_cache,
+                    stopped_by_deadline=stopped_by_deadline,
+                    best_fitness=timetable.best_fitness, conflicts=timetable.conflicts,
+                    finished_at=timezone.now())
+    except Exception:
+        jobs.update(status=GenerationJob.FAILED, error=traceback.format_exc(),
+                    finished_at=timezone.now())
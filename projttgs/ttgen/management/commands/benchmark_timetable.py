@@ -0,0 +1,544 @@
+import contextlib
+import io
+import os
+import random as rnd
+import time
+import tracemalloc
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from ttgen import solvers, synthetic, views
+
+
+def bench_construction(cmd, options):
+    """Build schedules with each construction strategy: time and placement rate."""
+    for strategy in ("random", "feasible", "dsatur"):
+        rnd.seed(options["seed"])
+        placed = unplaced = conflicts = 0
+        reasons = Counter()
+
+        start = time.perf_counter()
+        for _ in range(options["repeat"]):
+            schedule = views.Schedule().initialize(strategy)
+            missing = schedule.get_unplaced()
+            placed += views.data.numb_genes - len(missing)
+            unplaced += len(missing)
+            reasons.update(reason for _, reason in missing)
+            conflicts += schedule.get_numb_of_conflicts()
+        elapsed = (time.perf_counter() - start) / options["repeat"]
+
+        cmd.stdout.write(
+            f"{strategy:>9}: {elapsed * 1000:8.1f} ms/schedule | "
+            f"placed {placed / (placed + unplaced):6.1%} | "
+            f"conflicts {conflicts / options['repeat']:.1f}"
+        )
+        for reason, n in reasons.most_common():
+            cmd.stdout.write(f"{'':>11}{n / options['repeat']:6.1f} x {reason}")
+
+
+def bench_seeding(cmd, options):
+    """Initial population from each constructive strategy, then GA generations
+    until a member has no conflicts and no unplaced genes (or --max-gen)."""
+    ga = views.GeneticAlgorithm()
+    for strategy in ("feasible", "dsatur"):
+        rnd.seed(options["seed"])
+        start = time.perf_counter()
+        population = views.Population(views.POPULATION_SIZE, strategy=strategy)
+        build = time.perf_counter() - start
+
+        def missing(p):
+            return min(len(s.get_unplaced()) + s.get_numb_of_conflicts() for s in p.get_schedules())
+
+        initial = population.sort().get_schedules()[0]
+        initial_missing = min(len(s.get_unplaced()) for s in population.get_schedules())
+        gen = 0
+        while missing(population) and gen < options["max_gen"]:
+            population = ga.evolve(population).sort()
+            gen += 1
+        elapsed = time.perf_counter() - start
+
+        cmd.stdout.write(
+            f"{strategy:>9}: build {build * 1000:7.1f} ms | initial {initial.get_numb_of_conflicts()} "
+            f"conflicts, {initial_missing} unplaced | {gen:3d} generations, {elapsed:7.2f} s "
+            f"-> {missing(population)} conflicts + unplaced"
+        )
+
+
+def bench_generation(cmd, options):
+    """Memory held by one population and wall-clock per GA generation."""
+    rnd.seed(options["seed"])
+
+    tracemalloc.start()
+    population = views.Population(views.POPULATION_SIZE)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cmd.stdout.write(f"population of {views.POPULATION_SIZE}: {size / 1e6:.2f} MB")
+
+    ga = views.GeneticAlgorithm()
+    start = time.perf_counter()
+    for _ in range(options["repeat"]):
+        population = ga.evolve(population)
+        population.sort()
+    elapsed = (time.perf_counter() - start) / options["repeat"]
+    cmd.stdout.write(f"{elapsed * 1000:.1f} ms/generation")
+
+
+def bench_fitness(cmd, options):
+    """Whole-population scoring: scalar recount vs one vectorised pass."""
+    rnd.seed(options["seed"])
+    d = views.data
+    bases = [views.Schedule().initialize() for _ in range(3)]
+
+    for size in (9, 100, 1000):
+        population = views.Population(0)
+        for n in range(size):
+            schedule = views.Schedule()
+            base = bases[n % len(bases)]
+            for g in range(d.numb_genes):
+                schedule.set_gene(g, *base.get_gene(g))
+            for g in rnd.sample(range(d.numb_genes), d.numb_genes // 20):
+                schedule.set_gene(g, rnd.randrange(len(d.gene_blocks[g])),
+                                  rnd.randrange(d.numb_rooms), rnd.randrange(d.numb_instructors))
+            population.add_schedule(schedule)
+
+        start = time.perf_counter()
+        scalar = [s.calculate_fitness() for s in population.get_schedules()]
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = population.evaluate_all()
+        batch_time = time.perf_counter() - start
+
+        assert list(batch) == scalar
+        cmd.stdout.write(
+            f"population {size:>5}: scalar {scalar_time * 1000:9.1f} ms | "
+            f"batch {batch_time * 1000:8.1f} ms | x{scalar_time / batch_time:.1f}"
+        )
+
+
+def random_population(size):
+    """Schedules with every placeable gene at a random spot in its domain."""
+    d = views.data
+    population = views.Population(0)
+    for _ in range(size):
+        schedule = views.Schedule()
+        for g in range(d.numb_genes):
+            if d.gene_instructors[g] and d.gene_rooms[g] and d.gene_blocks[g]:
+                schedule.set_gene(g, rnd.randrange(len(d.gene_blocks[g])),
+                                  rnd.choice(d.gene_rooms[g]), rnd.choice(d.gene_instructors[g]))
+        population.add_schedule(schedule)
+    return population
+
+
+def evolve_until_feasible(population, max_gen=200):
+    """(generations, seconds, best) until the best schedule has no conflicts."""
+    ga = views.GeneticAlgorithm()
+    start = time.perf_counter()
+    population.sort()
+    gen = 0
+    while population.get_fitness_values()[0] < 1 and gen < max_gen:
+        population = ga.evolve(population)
+        population.sort()
+        gen += 1
+    return gen, time.perf_counter() - start, population.get_schedules()[0]
+
+
+def bench_mutation(cmd, options):
+    """Whole-schedule rebuild vs conflict-directed mutation, without child repair."""
+    d = views.data
+    configs = {
+        "rebuild": {"conflict_move": 0, "swap_classes": 0, "shift_lab": 0, "rebuild": 0.05},
+        "operators": dict(views.MUTATION_RATES, rebuild=0),
+    }
+    saved = views.MUTATION_RATES, views.REPAIR_CHILDREN
+    views.REPAIR_CHILDREN = False
+    try:
+        for name, rates in configs.items():
+            views.MUTATION_RATES = rates
+            rnd.seed(options["seed"])
+            gen, elapsed, best = evolve_until_feasible(random_population(views.POPULATION_SIZE))
+            cmd.stdout.write(
+                f"{name:>9}: {gen:3d} generations, {elapsed:6.2f} s | best: "
+                f"{best.get_numb_of_conflicts()} conflicts, {len(best.get_unplaced())} unplaced"
+            )
+    finally:
+        views.MUTATION_RATES, views.REPAIR_CHILDREN = saved
+
+    rnd.seed(options["seed"])
+    schedule = random_population(1).get_schedules()[0]
+    conflicted = schedule.get_conflicted()
+    moves = {
+        "rebuild": lambda: views.Schedule().initialize(),
+        "conflict_move": lambda: schedule.relocate(rnd.randrange(d.numb_genes)),
+        "swap_classes": lambda: schedule.swap_classes(conflicted),
+        "shift_lab": lambda: schedule.shift_lab(conflicted),
+    }
+    for name, move in moves.items():
+        n = 5 if name == "rebuild" else 500
+        start = time.perf_counter()
+        for _ in range(n):
+            move()
+        cmd.stdout.write(f"{name:>13}: {(time.perf_counter() - start) / n * 1e6:10.1f} us/move")
+
+
+def bench_memetic(cmd, options):
+    """Best conflicts over wall-clock, from random populations: the pure GA
+    vs local search on the elite every generation vs a final polish."""
+    configs = {
+        "GA": (None, "elite"),
+        "GA + anneal": ("anneal", "elite"),
+        "GA + tabu": ("tabu", "elite"),
+        "GA, tabu polish": ("tabu", "polish"),
+    }
+    limit = options["time_limit"]
+    checkpoints = [limit / 8, limit / 4, limit / 2, limit]
+    saved = views.LOCAL_SEARCH, views.LOCAL_SEARCH_STAGE
+    try:
+        for name, (method, stage) in configs.items():
+            views.LOCAL_SEARCH, views.LOCAL_SEARCH_STAGE = method, stage
+            rnd.seed(options["seed"])
+            population = random_population(views.POPULATION_SIZE).sort()
+            initial = population.get_schedules()[0].get_numb_of_conflicts()
+            ga = views.GeneticAlgorithm()
+
+            # A polish gets what the GA leaves of the time limit.
+            ga_limit = limit * 0.75 if stage == "polish" else limit
+            seen, gen = [], 0
+            start = time.perf_counter()
+            while (time.perf_counter() - start < ga_limit and
+                   population.get_schedules()[0].get_numb_of_conflicts()):
+                population = ga.evolve(population).sort()
+                gen += 1
+                elapsed = time.perf_counter() - start
+                while len(seen) < len(checkpoints) and elapsed >= checkpoints[len(seen)]:
+                    seen.append(population.get_schedules()[0].get_numb_of_conflicts())
+            best = population.get_schedules()[0]
+            if stage == "polish" and method:
+                best = views.LocalSearch(budget=limit - (time.perf_counter() - start)).run(best)
+            elapsed = time.perf_counter() - start
+            seen += [best.get_numb_of_conflicts()] * (len(checkpoints) - len(seen))
+
+            cmd.stdout.write(
+                f"{name:>15}: {initial} -> " +
+                " -> ".join(f"{n} @{t:g}s" for n, t in zip(seen, checkpoints)) +
+                f" conflicts | {gen} generations, {elapsed:.1f} s"
+            )
+    finally:
+        views.LOCAL_SEARCH, views.LOCAL_SEARCH_STAGE = saved
+
+
+def bench_engines(cmd, options):
+    """Every solver engine on the same instance, stopped at --time-limit."""
+    for name in solvers.ENGINES:
+        rnd.seed(options["seed"])
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            solution = solvers.solve(views.data, engine=name,
+                                     deadline=time.monotonic() + options["time_limit"])
+        elapsed = time.perf_counter() - start
+
+        if solution.proved_infeasible:
+            outcome = f"infeasible: {solution.reason}"
+        elif solution.stopped_by_deadline:
+            outcome = "stopped by deadline"
+        else:
+            outcome = "finished"
+        cmd.stdout.write(
+            f"{name:>13}: {elapsed:7.2f} s | {solution.conflicts} conflicts, "
+            f"{solution.unplaced} unplaced | {outcome}"
+        )
+
+
+def bench_components(cmd, options):
+    """
+    Every engine on the whole problem, then per component with one and
+    with --workers processes (use --own-rooms to get components).
+    """
+    snapshot = views.data
+    sizes = [len(sections) for sections in snapshot.components()]
+    cmd.stdout.write(f"{len(sizes)} components of {', '.join(map(str, sizes))} sections")
+    runs = [("whole", False, 1), ("components", True, 1),
+            (f"x{options['workers']} procs", True, options["workers"])]
+    for name in solvers.ENGINES:
+        for label, decompose, workers in runs:
+            rnd.seed(options["seed"])
+            start = time.perf_counter()
+            with override_settings(TTGEN_COMPONENT_WORKERS=workers), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                solution = solvers.solve(snapshot, engine=name, decompose=decompose,
+                                         deadline=time.monotonic() + options["time_limit"])
+            elapsed = time.perf_counter() - start
+            cmd.stdout.write(
+                f"{name:>13} {label:>11}: {elapsed:7.2f} s | {solution.conflicts} conflicts, "
+                f"{solution.unplaced} unplaced"
+                f"{' | stopped by deadline' if solution.stopped_by_deadline else ''}"
+            )
+
+
+def bench_deadline(cmd, options):
+    """
+    The GA with an unreachable fitness threshold, so only the deadline
+    stops it, at fractions of --time-limit: how far past the deadline it
+    returns, and how good the schedule is by then.
+    """
+    params = {"FITNESS_THRESHOLD": 2, "MAX_GEN": 10 ** 9}
+    for fraction in (0.05, 0.1, 0.25, 0.5, 1):
+        limit = options["time_limit"] * fraction
+        rnd.seed(options["seed"])
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            solution = solvers.solve(views.data, params, deadline=time.monotonic() + limit,
+                                     engine="ga")
+        elapsed = time.perf_counter() - start
+        cmd.stdout.write(
+            f"limit {limit:6.2f} s: returned after {elapsed:6.2f} s "
+            f"(+{(elapsed - limit) * 1000:5.0f} ms) | {solution.conflicts} conflicts, "
+            f"{solution.unplaced} unplaced | stopped by deadline: {solution.stopped_by_deadline}"
+        )
+
+
+def bench_parallel(cmd, options):
+    """Population build and generation time with 1..--workers processes."""
+    base = None
+    for workers in range(1, options["workers"] + 1):
+        rnd.seed(options["seed"])
+        pool = views.worker_pool(workers)
+        try:
+            start = time.perf_counter()
+            population = views.Population(views.POPULATION_SIZE, pool)
+            build = time.perf_counter() - start
+
+            ga = views.GeneticAlgorithm(pool)
+            start = time.perf_counter()
+            for _ in range(options["repeat"]):
+                population = ga.evolve(population)
+                population.sort()
+            generation = (time.perf_counter() - start) / options["repeat"]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        base = base or (build, generation)
+        cmd.stdout.write(
+            f"{workers:2d} workers: build {build * 1000:8.1f} ms (x{base[0] / build:.2f}) | "
+            f"{generation * 1000:8.1f} ms/generation (x{base[1] / generation:.2f})"
+        )
+
+
+def bench_islands(cmd, options):
+    """Wall-clock to zero conflicts: one population vs the island model."""
+    rnd.seed(options["seed"])
+    gen, elapsed, best = evolve_until_feasible(random_population(views.POPULATION_SIZE),
+                                               options["max_gen"])
+    cmd.stdout.write(f"   single: {gen:3d} generations, {elapsed:6.2f} s | "
+                     f"best: {best.get_numb_of_conflicts()} conflicts")
+
+    rnd.seed(options["seed"])
+    populations = [random_population(views.POPULATION_SIZE) for _ in range(options["islands"])]
+    pool = views.worker_pool(options["workers"])
+    try:
+        model = views.IslandModel(pool, options["islands"], options["interval"], options["migrants"])
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            best, gen = model.run(options["max_gen"], 1, populations)
+        elapsed = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    cmd.stdout.write(f"{options['islands']:2d} islands: {gen:3d} generations, {elapsed:6.2f} s | "
+                     f"best: {best.get_numb_of_conflicts()} conflicts "
+                     f"({options['workers']} workers)")
+
+
+def bench_repair(cmd, options):
+    """Repairing the last timetable after a data change vs regenerating it."""
+    rnd.seed(options["seed"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        meetings = views.generate_schedule().get_meetings()
+
+    changes = {
+        "delete a lab room": dict(lab_rooms=options["lab_rooms"] - 1),
+        "+1 class per week": dict(classes_per_week=options["classes_per_week"] + 1),
+    }
+    for change, overrides in changes.items():
+        views.data = synthetic.make_snapshot(**dict(snapshot_options(options), **overrides))
+        cmd.stdout.write(change)
+
+        start = time.perf_counter()
+        schedule, invalid = views.Schedule.from_meetings(meetings)
+        for g in invalid:
+            schedule.relocate(g)
+        write_outcome(cmd, f"{len(invalid)} genes repaired", schedule, meetings, start)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            schedule = views.generate_schedule()
+        write_outcome(cmd, "regenerated", schedule, meetings, start)
+
+
+def write_outcome(cmd, label, schedule, meetings, start):
+    elapsed = time.perf_counter() - start
+    kept = len(set(meetings) & set(schedule.get_meetings())) / len(meetings)
+    cmd.stdout.write(
+        f"  {label:>20}: {elapsed * 1000:9.1f} ms | {kept:6.1%} meetings unchanged | "
+        f"{schedule.get_numb_of_conflicts()} conflicts, {len(schedule.get_unplaced())} unplaced"
+    )
+
+
+def bench_warm_start(cmd, options):
+    """Generations and wall-clock to FITNESS_THRESHOLD after a data change,
+    from scratch vs warm-started from the previous timetable."""
+    rnd.seed(options["seed"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        meetings = views.generate_schedule().get_meetings()
+
+    views.data = synthetic.make_snapshot(**dict(
+        snapshot_options(options), classes_per_week=options["classes_per_week"] + 1))
+    cmd.stdout.write("after +1 class per week:")
+
+    saved = views.CONSTRUCTION_STRATEGY, views.WARM_START_FRACTION
+    try:
+        for strategy in ("random", "feasible"):
+            for fraction in (0, options["warm_fraction"]):
+                views.CONSTRUCTION_STRATEGY, views.WARM_START_FRACTION = strategy, fraction
+                rnd.seed(options["seed"])
+                generations = []
+
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    warm_start = None
+                    if fraction:
+                        warm_start, invalid = views.Schedule.from_meetings(meetings)
+                        for g in invalid:
+                            warm_start.relocate(g)
+                    best = views.generate_schedule(lambda gen, _: generations.append(gen), warm_start)
+                elapsed = time.perf_counter() - start
+
+                cmd.stdout.write(
+                    f"  {strategy:>8}, warm start {fraction:4.0%}: {generations[-1]:3d} generations, "
+                    f"{elapsed:7.2f} s | best fitness {best.get_fitness():.4f}, "
+                    f"{len(best.get_unplaced())} unplaced"
+                )
+    finally:
+        views.CONSTRUCTION_STRATEGY, views.WARM_START_FRACTION = saved
+
+
+def scan_tables(sections, all_labs, all_classes):
+    """The grid as the timetable view used to build it: a full scan of
+    the labs and classes for every (section, day, slot) cell."""
+    tables = []
+    for section in sections:
+        rows = []
+        for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]:
+            cells, slot = [], 1
+            while slot <= 9:
+                if slot == 5:
+                    cells.append(("lunch",))
+                    slot += 1
+                    continue
+                lab = next((lab for lab in all_labs
+                            if lab.section == section.section_id and lab.meeting_times and
+                            lab.meeting_times[0].day == day and
+                            int(lab.meeting_times[0].time) == slot), None)
+                if lab is not None:
+                    cells.append(("lab", lab))
+                    slot += 4
+                    continue
+                classes = [cls for cls in all_classes
+                           if cls.section == section.section_id and cls.meeting_time is not None and
+                           cls.meeting_time.day == day and int(cls.meeting_time.time) == slot]
+                cells.append(("class", *classes) if classes else ("empty",))
+                slot += 1
+            rows.append(cells)
+        tables.append(rows)
+    return tables
+
+
+def bench_grid(cmd, options):
+    """Timetable grid: full scans per cell vs the (section, day, slot) index."""
+    rnd.seed(options["seed"])
+    schedule = views.Schedule().initialize()
+    sections = views.data.get_sections()
+    labs, classes = schedule.get_labs(), schedule.get_classes()
+
+    start = time.perf_counter()
+    scanned = scan_tables(sections, labs, classes)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tables = views.build_tables(sections, labs, classes)
+    index_time = time.perf_counter() - start
+
+    assert scanned == [[[(c["type"], c["lab"]) if c["type"] == "lab" else
+                         (c["type"], *c["classes"]) for c in row["cells"]]
+                        for row in t["rows"]] for t in tables]
+    cmd.stdout.write(
+        f"{len(labs) + len(classes)} meetings: scan {scan_time * 1000:9.1f} ms | "
+        f"index {index_time * 1000:7.1f} ms | x{scan_time / index_time:.0f}"
+    )
+
+
+BENCHMARKS = {
+    "grid": bench_grid,
+    "warm-start": bench_warm_start,
+    "repair": bench_repair,
+    "islands": bench_islands,
+    "memetic": bench_memetic,
+    "parallel": bench_parallel,
+    "mutation": bench_mutation,
+    "fitness": bench_fitness,
+    "construction": bench_construction,
+    "engines": bench_engines,
+    "components": bench_components,
+    "deadline": bench_deadline,
+    "seeding": bench_seeding,
+    "generation": bench_generation,
+}
+
+
+def snapshot_options(options):
+    return dict(
+        sections=options["sections"],
+        departments=options["departments"],
+        classes_per_week=options["classes_per_week"],
+        lecture_rooms=options["lecture_rooms"],
+        lab_rooms=options["lab_rooms"],
+        own_rooms=options["own_rooms"],
+        seed=options["seed"],
+    )
+
+
+class Command(BaseCommand):
+    help = "Benchmark timetable generation on a synthetic instance."
+
+    def add_arguments(self, parser):
+        parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+        parser.add_argument("--sections", type=int, default=60)
+        parser.add_argument("--departments", type=int, default=6)
+        parser.add_argument("--classes-per-week", type=int, default=25)
+        parser.add_argument("--lecture-rooms", type=int, default=40)
+        parser.add_argument("--lab-rooms", type=int, default=8)
+        parser.add_argument("--own-rooms", action="store_true",
+                            help="deal rooms out to departments instead of sharing them")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--population", type=int, default=views.POPULATION_SIZE)
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--islands", type=int, default=4)
+        parser.add_argument("--interval", type=int, default=views.MIGRATION_INTERVAL)
+        parser.add_argument("--migrants", type=int, default=views.MIGRANTS)
+        parser.add_argument("--max-gen", type=int, default=200)
+        parser.add_argument("--warm-fraction", type=float, default=0.5)
+        parser.add_argument("--time-limit", type=float, default=20,
+                            help="seconds per configuration (memetic, engines, components, deadline)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        views.POPULATION_SIZE = options["population"]
+        views.data = synthetic.make_snapshot(**snapshot_options(options))
+        self.stdout.write(
+            f"{options['sections']} sections, {options['classes_per_week']} classes/week, "
+            f"{options['lecture_rooms']} lecture + {options['lab_rooms']} lab rooms"
+        )
+        BENCHMARKS[options["benchmark"]](self, options)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ttgen import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued timetable generation jobs (for TTGEN_JOB_RUNNER = 'command')."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Run the jobs queued now, then exit.")
+        parser.add_argument("--poll", type=float, default=2.0,
+                            help="Seconds between checks for new jobs.")
+
+    def handle(self, *args, **options):
+        while True:
+            pk = jobs.claim_next()
+            if pk is not None:
+                self.stdout.write(f"Running job {pk}")
+                jobs.run_job(pk)
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["poll"])
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='room_required',
+            field=models.CharField(default='Lecture Hall', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='time',
+            field=models.CharField(default='1', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='room_type',
+            field=models.CharField(default='Lecture Hall', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='meetingtime',
+            name='time',
+            field=models.CharField(choices=[('1', '1'), ('2', '2'), ('3', '3'), ('4', '4'), ('5', '5'), ('6', '6'), ('7', '7'), ('8', '8')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='generationjob',
+            name='result',
+        ),
+        migrations.CreateModel(
+            name='GeneratedTimetable',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('best_fitness', models.FloatField()),
+                ('conflicts', models.IntegerField()),
+                ('unplaced', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='timetable', to='ttgen.generationjob')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduledMeeting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration', models.IntegerField(default=1)),
+                ('is_lab', models.BooleanField(default=False)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ttgen.course')),
+                ('instructor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='ttgen.instructor')),
+                ('meeting_time', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='ttgen.meetingtime')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='ttgen.room')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ttgen.section')),
+                ('timetable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='ttgen.generatedtimetable')),
+            ],
+        ),
+    ]
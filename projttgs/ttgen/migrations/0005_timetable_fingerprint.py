@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0004_generatedtimetable'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='generatedtimetable',
+            name='job',
+        ),
+        migrations.AddField(
+            model_name='generatedtimetable',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='from_cache',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='timetable',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='ttgen.generatedtimetable'),
+        ),
+    ]
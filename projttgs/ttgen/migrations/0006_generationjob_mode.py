@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0005_timetable_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='mode',
+            field=models.CharField(choices=[('generate', 'Generate'), ('repair', 'Repair')], default='generate', max_length=10),
+        ),
+    ]
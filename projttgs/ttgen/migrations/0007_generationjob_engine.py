@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0006_generationjob_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='engine',
+            field=models.CharField(default='ga', max_length=20),
+        ),
+    ]
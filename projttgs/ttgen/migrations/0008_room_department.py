@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0007_generationjob_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='ttgen.department'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ttgen', '0008_room_department'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='stopped_by_deadline',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='time_limit',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 import math
 import random as rnd
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.core.cache import cache
 from datetime import timedelta, date
 
 time_slots = (
@@ -34,6 +35,9 @@ class Room(models.Model):
     r_number = models.CharField(max_length=6)
     seating_capacity = models.IntegerField(default=0)
     room_type = models.CharField(max_length=20, default='Lecture Hall')
+    # A room in a department's own building is only used by its sections;
+    # rooms with no department are shared by all.
+    department = models.ForeignKey('Department', on_delete=models.SET_NULL, blank=True, null=True)
 
     def __str__(self):
         return f"{self.r_number} ({self.room_type})"
@@ -87,3 +91,101 @@ class Section(models.Model):
 
     def __str__(self):
         return self.section_id
+
+
+class GenerationJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    # "generate" runs the GA; "repair" carries the latest timetable over
+    # to changed data
+    GENERATE = 'generate'
+    REPAIR = 'repair'
+    MODES = (
+        (GENERATE, 'Generate'),
+        (REPAIR, 'Repair'),
+    )
+
+    mode = models.CharField(max_length=10, choices=MODES, default=GENERATE)
+    # Name of the solver engine (see ttgen/solvers.py)
+    engine = models.CharField(max_length=20, default='ga')
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    generation = models.IntegerField(default=0)
+    best_fitness = models.FloatField(blank=True, null=True)
+    conflicts = models.IntegerField(blank=True, null=True)
+    # Seconds the solver may run (None: until it finishes), and whether it
+    # was cut short and returned its best schedule so far
+    time_limit = models.FloatField(blank=True, null=True)
+    stopped_by_deadline = models.BooleanField(default=False)
+    # The stored result; several jobs share one when served from the cache
+    timetable = models.ForeignKey('GeneratedTimetable', on_delete=models.SET_NULL,
+                                  blank=True, null=True, related_name='jobs')
+    from_cache = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'Job {self.pk} ({self.status})'
+
+
+class GeneratedTimetable(models.Model):
+    version = models.PositiveIntegerField(unique=True)
+    # Hash of the problem and GA parameters it was solved for
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    best_fitness = models.FloatField()
+    conflicts = models.IntegerField()
+    # JSON list of the genes that could not be placed, with reasons
+    unplaced = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Timetable v{self.version}'
+
+
+class ScheduledMeeting(models.Model):
+    # A class (duration 1) or lab (duration LAB_DURATION consecutive slots)
+    # starting at meeting_time. Rooms, instructors and times are nulled
+    # rather than deleted with their rows, so a version keeps its shape.
+    timetable = models.ForeignKey(GeneratedTimetable, on_delete=models.CASCADE,
+                                  related_name='meetings')
+    section = models.ForeignKey(Section, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    room = models.ForeignKey(Room, on_delete=models.SET_NULL, blank=True, null=True)
+    instructor = models.ForeignKey(Instructor, on_delete=models.SET_NULL, blank=True, null=True)
+    meeting_time = models.ForeignKey(MeetingTime, on_delete=models.SET_NULL, blank=True, null=True)
+    duration = models.IntegerField(default=1)
+    is_lab = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.section_id} {self.course_id} @ {self.meeting_time_id}'
+
+
+# Cache key of the current problem's content hash (see
+# ProblemSnapshot.problem_hash); any change to the data clears it. The
+# cache must be shared by all processes (settings.CACHES) for that to
+# reach them.
+PROBLEM_HASH_CACHE_KEY = 'ttgen:problem-hash'
+
+
+def invalidate_problem_hash(sender, **kwargs):
+    cache.delete(PROBLEM_HASH_CACHE_KEY)
+    # again once committed, in case another process hashed the old data
+    # in between
+    transaction.on_commit(lambda: cache.delete(PROBLEM_HASH_CACHE_KEY))
+
+
+for _model in (Room, Instructor, MeetingTime, Course, Department, Section):
+    post_save.connect(invalidate_problem_hash, sender=_model)
+    post_delete.connect(invalidate_problem_hash, sender=_model)
+m2m_changed.connect(invalidate_problem_hash, sender=Course.instructors.through)
+m2m_changed.connect(invalidate_problem_hash, sender=Department.courses.through)
@@ -0,0 +1,158 @@
+"""
+PDF export of stored timetables.
+
+PDFs are cached on disk under settings.TTGEN_PDF_DIR, one directory per
+GeneratedTimetable version: the whole timetable and one file per section.
+A version never changes once saved, so a file is rendered at most once.
+
+Templates are rendered to HTML here; only the HTML goes to the process
+pool, where xhtml2pdf turns each section into a PDF.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.text import get_valid_filename
+
+from . import views
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PdfError(Exception):
+    """xhtml2pdf could not render a timetable."""
+
+
+def cache_dir(timetable):
+    """
+    The directory of a version's PDFs. Its creation time is part of the
+    name so a version number reused after a database reset misses.
+    """
+    root = getattr(settings, "TTGEN_PDF_DIR", os.path.join(settings.BASE_DIR, "pdf_cache"))
+    return os.path.join(root, f"v{timetable.version}-{timetable.created_at:%Y%m%d%H%M%S%f}")
+
+
+def section_filename(section_id):
+    return get_valid_filename(section_id) + ".pdf"
+
+
+def sections_dir(timetable):
+    return os.path.join(cache_dir(timetable), "sections")
+
+
+def section_path(timetable, section_id):
+    return os.path.join(sections_dir(timetable), section_filename(section_id))
+
+
+def write_pdf(html, path):
+    """Render ``html`` to ``path``, replacing it atomically. Runs in the pool."""
+    from .render import Render  # xhtml2pdf is only needed here
+
+    pdf = Render.to_pdf(html)
+    if pdf is None:
+        raise PdfError(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+    return path
+
+
+def render_html(timetable, tables):
+    return render_to_string("gentimetable.html", {
+        "timetable": timetable,
+        "tables": tables,
+        "SLOT_LABELS": views.SLOT_LABELS,
+    })
+
+
+def pdf_pool(workers, tasks):
+    """
+    A process pool for ``tasks`` PDFs, or None to render them here.
+    ``workers`` defaults to settings.TTGEN_PDF_WORKERS, else 1.
+    """
+    if workers is None:
+        workers = getattr(settings, "TTGEN_PDF_WORKERS", 1)
+    workers = min(workers, tasks)
+    if workers <= 1:
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+
+def timetable_pdf(timetable):
+    """The path of the PDF of every section of a version, rendering it if needed."""
+    path = os.path.join(cache_dir(timetable), "timetable.pdf")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir(timetable), exist_ok=True)
+        write_pdf(render_html(timetable, views.timetable_views(timetable)["section"]), path)
+    return path
+
+
+def section_pdfs(timetable, section_ids=None, workers=None):
+    """
+    {section_id: path} of the per-section PDFs of a version, for
+    ``section_ids`` (default: all sections). Sections missing from the
+    cache are rendered in parallel first.
+    """
+    tables = views.timetable_views(timetable)["section"]
+    if section_ids is not None:
+        wanted = set(map(str, section_ids))
+        tables = [t for t in tables if str(t["owner"].pk) in wanted]
+
+    paths = {t["owner"].pk: section_path(timetable, t["owner"].pk) for t in tables}
+    missing = [t for t in tables if not os.path.exists(paths[t["owner"].pk])]
+    if missing:
+        os.makedirs(sections_dir(timetable), exist_ok=True)
+        html = [render_html(timetable, [t]) for t in missing]
+        targets = [paths[t["owner"].pk] for t in missing]
+        pool = pdf_pool(workers, len(missing))
+        if pool is None:
+            list(map(write_pdf, html, targets))
+        else:
+            with pool:
+                list(pool.map(write_pdf, html, targets))
+    return paths
+
+
+class _Pipe:
+    """A write-only stream that buffers what zipfile writes until drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_zip(files):
+    """
+    A ZIP archive of ``files`` ((name, path) pairs), produced piece by piece
+    while each file is read in CHUNK_SIZE blocks. PDFs are already compressed,
+    so entries are stored as they are.
+    """
+    return (chunk for chunk in _zip_chunks(files) if chunk)
+
+
+def _zip_chunks(files):
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w", zipfile.ZIP_STORED) as archive:
+        for name, path in files:
+            with open(path, "rb") as src, archive.open(name, "w") as dest:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    yield pipe.drain()
+            yield pipe.drain()
+    yield pipe.drain()
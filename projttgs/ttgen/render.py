@@ -1,4 +1,3 @@
-
 from io import BytesIO
 from django.http import HttpResponse
 from django.template.loader import get_template
@@ -11,9 +10,17 @@ class Render:
     def render(path: str, params: dict):
         template = get_template(path)
         html = template.render(params)
-        res = BytesIO()
-        pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), res)
-        if not pdf.err:
-            return HttpResponse(res.getvalue(), content_type='application/pdf')
+        pdf = Render.to_pdf(html)
+        if pdf is not None:
+            return HttpResponse(pdf, content_type='application/pdf')
         else:
             return HttpResponse("Error Rendering PDF", status=400)
+
+    @staticmethod
+    def to_pdf(html: str):
+        """The PDF for ``html`` as bytes, or None if xhtml2pdf failed."""
+        res = BytesIO()
+        pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), res)
+        if pdf.err:
+            return None
+        return res.getvalue()
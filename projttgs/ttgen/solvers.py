@@ -0,0 +1,508 @@
+"""
+Timetable solver engines.
+
+Every engine is reached through ``solve(snapshot, params, deadline)``,
+which returns a Solution:
+
+  "ga"           – the genetic algorithm of views.generate_schedule();
+                   ``params`` override its module settings
+  "backtracking" – a complete search with forward checking that places
+                   every gene without a conflict, or proves it can't
+
+``deadline`` is a time.monotonic() value (or None): engines stop there
+and return the best they have. The engine is picked per run by name;
+settings.TTGEN_SOLVER_ENGINE is the default.
+
+Sections that share no candidate instructor or room with each other
+(departments in buildings of their own) are independent subproblems:
+``solve`` runs the engine on each component of the snapshot separately,
+in parallel over settings.TTGEN_COMPONENT_WORKERS processes, and merges
+the results.
+"""
+import multiprocessing
+import random as rnd
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+from . import views
+
+
+class Solution:
+    """The best schedule an engine found, and how its search ended."""
+
+    def __init__(self, schedule, engine, proved_infeasible=False, reason="",
+                 stopped_by_deadline=False, stats=None):
+        self.schedule = schedule
+        self.engine = engine
+        # No conflict-free timetable places every gene; ``reason`` says why.
+        self.proved_infeasible = proved_infeasible
+        self.reason = reason
+        self.stopped_by_deadline = stopped_by_deadline
+        self.stats = stats or {}
+
+    @property
+    def conflicts(self):
+        return self.schedule.get_numb_of_conflicts()
+
+    @property
+    def unplaced(self):
+        return len(self.schedule.get_unplaced())
+
+
+def default_engine():
+    return getattr(settings, "TTGEN_SOLVER_ENGINE", "ga")
+
+
+def get_engine(name=None):
+    name = name or default_engine()
+    if name not in ENGINES:
+        raise ValueError(f"unknown solver engine {name!r}")
+    return ENGINES[name]
+
+
+def solve(snapshot, params=None, deadline=None, engine=None, decompose=True, **kwargs):
+    """
+    Solve ``snapshot`` with the named engine (default: default_engine()),
+    one component at a time unless ``decompose`` is false.
+    """
+    engine = get_engine(engine)
+    components = snapshot.components() if decompose else []
+    if len(components) > 1:
+        return solve_components(snapshot, components, params, deadline, engine, **kwargs)
+    return engine.solve(snapshot, params, deadline, **kwargs)
+
+
+def past(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+# ---------------- DECOMPOSITION ----------------
+
+def _gene_key(d, g):
+    """What identifies a gene across snapshots: its section, course and kind."""
+    return (d.get_sections()[d.gene_section[g]].pk, d.get_courses()[d.gene_course[g]].pk,
+            d.gene_is_lab[g])
+
+
+def _solve_component(snapshot, engine, params, deadline, warm_meetings, report=None):
+    """
+    Solve one component, here or in a pool worker. Returns what the merge
+    needs, keyed by model pks: the placed meetings, the reasons genes were
+    left unplaced, and how the search ended.
+    """
+    views.data = snapshot
+    warm_start = None
+    if warm_meetings is not None:
+        warm_start, _ = views.Schedule.from_meetings(warm_meetings)
+    solution = ENGINES[engine].solve(snapshot, params, deadline, report=report,
+                                     warm_start=warm_start)
+    unplaced = [(_gene_key(snapshot, g), reason) for g, reason in solution.schedule.get_unplaced()]
+    return (solution.schedule.get_meetings(), unplaced, solution.proved_infeasible,
+            solution.reason, solution.stopped_by_deadline, solution.stats)
+
+
+def _merge(snapshot, results):
+    """One schedule of ``snapshot`` from the (meetings, unplaced, ...) results of components."""
+    meetings, reasons = [], {}
+    for placed, unplaced, *_ in results:
+        meetings += placed
+        for key, reason in unplaced:
+            reasons.setdefault(key, []).append(reason)
+    views.data = snapshot
+    schedule, unplaced = views.Schedule.from_meetings(meetings)
+    for g in unplaced:
+        pending = reasons.get(_gene_key(snapshot, g))
+        if pending:
+            schedule._unplaced[g] = pending.pop(0)
+    return schedule
+
+
+def component_pool(tasks):
+    """
+    A process pool for ``tasks`` components, or None to solve them here.
+    Workers are forked, so with settings.TTGEN_COMPONENT_WORKERS above 1
+    run jobs with the run_generation_jobs command rather than in a thread
+    of the web process.
+    """
+    workers = min(getattr(settings, "TTGEN_COMPONENT_WORKERS", 1), tasks)
+    if workers <= 1:
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+
+def solve_components(snapshot, components, params, deadline, engine, report=None,
+                     warm_start=None):
+    """
+    Solve each of ``components`` (as from snapshot.components()) on its
+    own subproblem and merge the results into one schedule of
+    ``snapshot``. The merged timetable is infeasible if any part is;
+    ``stats`` holds each component's size and stats.
+
+    Without a pool, components are solved one after another, each with an
+    equal share of the time left before ``deadline``, and ``report(gen,
+    best)`` follows every generation: ``best`` is the finished components
+    merged with the current one's best, ``gen`` counts generations over
+    all components so far. With a pool, ``report`` is called as each
+    component finishes, with the number finished.
+    """
+    subproblems = [snapshot.subproblem(sections) for sections in components]
+    warm = None if warm_start is None else warm_start.get_meetings()
+
+    pool = component_pool(len(subproblems))
+    results = [None] * len(subproblems)
+    if pool is None:
+        done = 0  # generations of the components already solved
+        try:
+            for n, sub in enumerate(subproblems):
+                share = deadline
+                if deadline is not None:
+                    share = time.monotonic() + (deadline - time.monotonic()) / (len(subproblems) - n)
+
+                last = [0]
+
+                def progress(gen, best, finished=results[:n]):
+                    last[0] = gen
+                    current = views.data
+                    try:
+                        report(done + gen, _merge(snapshot, finished + [(best.get_meetings(), ())]))
+                    finally:
+                        views.data = current
+
+                results[n] = _solve_component(sub, engine.name, params, share, warm,
+                                              progress if report is not None else None)
+                done += last[0]
+        finally:
+            views.data = snapshot
+    else:
+        with pool:
+            futures = {pool.submit(_solve_component, sub, engine.name, params, deadline, warm): n
+                       for n, sub in enumerate(subproblems)}
+            for finished, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if report is not None:
+                    report(finished, _merge(snapshot, [r for r in results if r is not None]))
+        done = len(subproblems)
+
+    schedule = _merge(snapshot, results)
+    if report is not None:
+        report(done, schedule)
+
+    return Solution(
+        schedule, engine.name,
+        proved_infeasible=any(r[2] for r in results),
+        reason="; ".join(r[3] for r in results if r[3]),
+        stopped_by_deadline=any(r[4] for r in results),
+        stats={"components": [dict(r[5], genes=sub.numb_genes)
+                              for sub, r in zip(subproblems, results)]},
+    )
+
+
+# ---------------- GENETIC ALGORITHM ----------------
+
+class GeneticAlgorithmEngine:
+    name = "ga"
+
+    def parameters(self, params=None):
+        return views.ga_parameters(params)
+
+    def solve(self, snapshot, params=None, deadline=None, report=None, warm_start=None):
+        params = views.ga_parameters(params)
+        views.data = snapshot
+        schedule = views.generate_schedule(report, warm_start, deadline, params)
+        stopped = past(deadline) and schedule.get_fitness() < params["FITNESS_THRESHOLD"]
+        return Solution(schedule, self.name, stopped_by_deadline=stopped)
+
+
+# ---------------- BACKTRACKING ----------------
+
+def capacity_shortfall(d):
+    """
+    A reason no conflict-free timetable can place every gene, found by
+    counting slots against demand, or None. Checked per section, per room
+    type and per set of candidate instructors.
+    """
+    week = len(d.class_blocks)
+    width = [views.LAB_DURATION if lab else 1 for lab in d.gene_is_lab]
+
+    for s, genes in enumerate(d.section_genes):
+        need = sum(width[g] for g in genes)
+        if need > week:
+            return f"section {d.get_sections()[s]} needs {need} slots a week, there are {week}"
+
+    by_rooms = {}
+    for g in range(d.numb_genes):
+        by_rooms.setdefault((d.gene_rooms[g], d.gene_blocks[g]), []).append(g)
+    for (rooms, blocks), genes in by_rooms.items():
+        if len(genes) > len(rooms) * len(blocks):
+            kind = "labs" if d.gene_is_lab[genes[0]] else "classes"
+            return (f"{len(genes)} {kind} need a room, there are {len(rooms)} rooms "
+                    f"x {len(blocks)} blocks")
+
+    for insts in set(d.gene_instructors):
+        pool = set(insts)
+        need = sum(width[g] for g in range(d.numb_genes) if pool.issuperset(d.gene_instructors[g]))
+        if need > len(pool) * week:
+            names = ", ".join(str(d.get_instructors()[i]) for i in insts)
+            return f"{need} slots of teaching fall to {names}, who have {len(pool) * week}"
+    return None
+
+
+class Backtracking:
+    """
+    Depth-first search over genes, most constrained first (fewest open
+    blocks, then highest degree), with forward checking.
+
+    Each gene keeps the set of blocks it could still take: its section is
+    free there and so are a room and a candidate instructor. Placing a
+    gene closes those blocks for its section's genes, its instructor's
+    genes and, once every room a gene could use is taken, that gene; a
+    gene left with no block is a dead end. Only blocks and instructors are
+    branched on: a gene takes its first free room, its department's own
+    before shared ones. That loses nothing while the genes' room sets are
+    equal or disjoint (``complete``); when a department's own rooms are
+    mixed with shared ones, an exhausted search proves nothing.
+    """
+
+    def __init__(self, snapshot, rng, hint=None):
+        d = self._data = snapshot
+        self._rng = rng
+        self.schedule = views.Schedule()
+        self.nodes = 0
+
+        # slot -> the blocks holding it, for each table of blocks
+        self._slot_blocks = {}
+        for blocks in d.gene_blocks:
+            if id(blocks) not in self._slot_blocks:
+                holding = [[] for _ in range(d.numb_slots)]
+                for b, block in enumerate(blocks):
+                    for t in block:
+                        holding[t].append(b)
+                self._slot_blocks[id(blocks)] = holding
+
+        # room set -> its genes, and room -> the room sets holding it
+        self._room_genes, self._room_sets = {}, {}
+        for g in range(d.numb_genes):
+            self._room_genes.setdefault(id(d.gene_rooms[g]), []).append(g)
+            self._room_sets[id(d.gene_rooms[g])] = d.gene_rooms[g]
+        self._sets_with_room = [[] for _ in range(d.numb_rooms)]
+        for key, rooms in self._room_sets.items():
+            for r in rooms:
+                self._sets_with_room[r].append(key)
+        sets = [set(rooms) for rooms in self._room_sets.values()]
+        self.complete = all(a == b or not a & b for a in sets for b in sets)
+
+        # Preferred (block, instructor) per gene, tried first.
+        self._hint = {}
+        if hint is not None:
+            for g in range(d.numb_genes):
+                time, _, instructor = hint.get_gene(g)
+                if time != views.UNPLACED:
+                    self._hint[g] = (time, instructor)
+
+        self._open = [bytearray(len(d.gene_blocks[g])) for g in range(d.numb_genes)]
+        self._size = [0] * d.numb_genes
+        for g in range(d.numb_genes):
+            for b in range(len(d.gene_blocks[g])):
+                if self._allowed(g, b):
+                    self._open[g][b] = 1
+                    self._size[g] += 1
+
+        self._unassigned = set(range(d.numb_genes))
+        self._trail = []  # (gene, block) closed by each placement, in order
+        self._best = None
+        self.depth = -1  # most genes placed at once so far
+        self.reason = ""
+
+    @staticmethod
+    def _any_free(occ, width, block, keys):
+        return any(not any(occ[t * width + k] for t in block) for k in keys)
+
+    def _allowed(self, g, b):
+        d, sch = self._data, self.schedule
+        block = d.gene_blocks[g][b]
+        s, S = d.gene_section[g], d.numb_sections
+        return (not any(sch._section_occ[t * S + s] for t in block) and
+                self._any_free(sch._room_occ, d.numb_rooms, block, d.gene_rooms[g]) and
+                self._any_free(sch._instructor_occ, d.numb_instructors, block, d.gene_instructors[g]))
+
+    def _values(self, g):
+        d, sch = self._data, self.schedule
+        blocks = [b for b, open_ in enumerate(self._open[g]) if open_]
+        self._rng.shuffle(blocks)
+        hint = self._hint.get(g)
+
+        # The least busy instructors first, so no one runs out of free
+        # slots early; blocks in random order among equals.
+        I = d.numb_instructors
+        busy = {i: sum(sch._instructor_occ[t * I + i] for t in range(d.numb_slots))
+                for i in d.gene_instructors[g]}
+        values = [(b, i) for b in blocks
+                  for i in sch._free(sch._instructor_occ, I, d.gene_blocks[g][b], d.gene_instructors[g])]
+        values.sort(key=lambda value: busy[value[1]])
+        if hint and hint in values:
+            values.remove(hint)
+            values.insert(0, hint)
+        return values
+
+    def _place(self, g, b, instructor):
+        """Place gene g and close what it takes from the others; False on a wipe-out."""
+        d, sch = self._data, self.schedule
+        block = d.gene_blocks[g][b]
+        rooms = d.gene_rooms[g]
+        room = sch._free(sch._room_occ, d.numb_rooms, block, rooms)[0]
+        sch.set_gene(g, b, room, instructor)
+        self._unassigned.discard(g)
+
+        affected = d.section_genes[d.gene_section[g]] + d.instructor_genes[instructor]
+        R = d.numb_rooms
+        for key in self._sets_with_room[room]:
+            if any(all(sch._room_occ[t * R + r] for r in self._room_sets[key]) for t in block):
+                affected += tuple(self._room_genes[key])
+
+        for h in set(affected):
+            if h not in self._unassigned:
+                continue
+            open_, holding = self._open[h], self._slot_blocks[id(d.gene_blocks[h])]
+            for t in block:
+                for b2 in holding[t]:
+                    if open_[b2] and not self._allowed(h, b2):
+                        open_[b2] = 0
+                        self._size[h] -= 1
+                        self._trail.append((h, b2))
+            if not self._size[h]:
+                return False
+        return True
+
+    def _unplace(self, g, mark):
+        while len(self._trail) > mark:
+            h, b = self._trail.pop()
+            self._open[h][b] = 1
+            self._size[h] += 1
+        self.schedule.set_gene(g, views.UNPLACED, views.UNPLACED, views.UNPLACED)
+        self._unassigned.add(g)
+
+    def run(self, deadline=None, max_nodes=0):
+        """
+        Search until every gene is placed ("solved"), the search space is
+        exhausted ("infeasible", or "exhausted" if not ``complete``), or
+        ``deadline`` / ``max_nodes`` is hit ("deadline" / "max nodes").
+        """
+        d = self._data
+        degree = d.gene_degree
+        for g in range(d.numb_genes):
+            if not self._size[g]:
+                self.reason = f"{d.describe_gene(g)} has no possible placement"
+                return "infeasible"
+
+        frames = []  # [gene, values, next value, trail mark while placed]
+        while self._unassigned:
+            g = min(self._unassigned, key=lambda h: (self._size[h], -degree[h]))
+            frames.append([g, self._values(g), 0, None])
+
+            while frames:
+                frame = frames[-1]
+                g, values, k, mark = frame
+                if mark is not None:
+                    self._unplace(g, mark)
+                    frame[3] = None
+                if k == len(values):
+                    frames.pop()
+                    continue
+
+                self.nodes += 1
+                if self.nodes % 256 == 0 and past(deadline):
+                    return "deadline"
+                if max_nodes and self.nodes > max_nodes:
+                    return "max nodes"
+
+                frame[2] = k + 1
+                frame[3] = len(self._trail)
+                if self._place(g, *values[k]):
+                    depth = d.numb_genes - len(self._unassigned)
+                    if depth > self.depth:
+                        self.depth = depth
+                        self._best = [array("i", genes) for genes in self.schedule.get_chromosome()]
+                    break
+            else:
+                if not self.complete:
+                    return "exhausted"
+                self.reason = "no conflict-free timetable places every gene"
+                return "infeasible"
+        return "solved"
+
+    def best_schedule(self):
+        """The complete schedule, or the deepest partial one the search reached."""
+        if not self._unassigned:
+            return self.schedule.copy()
+        if self._best is None:
+            return views.Schedule()
+        return views.Schedule.from_chromosome(*self._best)
+
+
+class BacktrackingEngine:
+    name = "backtracking"
+    # MAX_NODES     – values tried before giving up (0: no limit)
+    # RESTART_NODES – values tried before the search starts over with a
+    #                 new value order, doubled at every restart (0: never)
+    # SEED          – seed for the order values are tried in
+    defaults = {"MAX_NODES": 0, "RESTART_NODES": 2000, "SEED": 0}
+
+    def parameters(self, params=None):
+        unknown = set(params or ()) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"unknown backtracking parameters: {', '.join(sorted(unknown))}")
+        return dict(self.defaults, **(params or {}))
+
+    def solve(self, snapshot, params=None, deadline=None, report=None, warm_start=None):
+        """
+        Place every gene without a conflict, or prove that can't be done.
+        Otherwise (and on a proof) the deepest partial schedule is
+        returned, with whatever else fits placed by Schedule.repair().
+        """
+        views.data = snapshot
+        params = self.parameters(params)
+
+        reason = capacity_shortfall(snapshot)
+        if reason is not None:
+            schedule = views.Schedule().initialize("feasible")
+            return Solution(schedule, self.name, proved_infeasible=True, reason=reason)
+
+        # Restarts cut off the long fruitless subtrees one bad early choice
+        # can lead to; each search is complete if it runs out of values.
+        rng = rnd.Random(params["SEED"])
+        budget, restart = params["MAX_NODES"], params["RESTART_NODES"]
+        nodes, best = 0, None
+        while True:
+            limits = [n for n in (restart, budget and budget - nodes) if n]
+            limit = min(limits) if limits else 0
+            search = Backtracking(snapshot, rng, warm_start)
+            outcome = search.run(deadline, limit)
+            nodes += search.nodes
+            if best is None or search.depth > best.depth:
+                best = search
+            if outcome != "max nodes" or (budget and nodes >= budget):
+                break
+            restart *= 2
+        schedule = (search if outcome == "solved" else best).best_schedule()
+        if outcome != "solved":
+            schedule.repair()
+        if report is not None:
+            report(0, schedule)
+
+        return Solution(
+            schedule, self.name,
+            proved_infeasible=outcome == "infeasible",
+            reason=search.reason,
+            stopped_by_deadline=outcome == "deadline",
+            stats={"nodes": nodes, "outcome": outcome},
+        )
+
+
+ENGINES = {
+    engine.name: engine for engine in (GeneticAlgorithmEngine(), BacktrackingEngine())
+}
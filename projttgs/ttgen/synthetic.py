@@ -0,0 +1,86 @@
+"""
+Synthetic timetabling instances for benchmarks.
+
+Instances are built from unsaved model instances and handed straight to
+ProblemSnapshot, so nothing touches the database.
+"""
+import random as rnd
+
+from .models import Course, Department, Instructor, MeetingTime, Room, Section
+from .views import ProblemSnapshot
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+SLOTS = ["1", "2", "3", "4", "5", "6", "7", "8", "9"]
+
+
+def make_snapshot(sections=60, departments=6, courses_per_dept=6, lab_courses_per_dept=1,
+                  instructors_per_dept=20, instructors_per_course=3,
+                  lecture_rooms=40, lab_rooms=8, classes_per_week=25, own_rooms=False, seed=0):
+    """
+    Build a random problem of the given size.
+
+    Sections are spread evenly over departments; each department draws its
+    course instructors from its own pool, and all departments share rooms
+    unless ``own_rooms``, which deals the rooms out to the departments in
+    turn, as if each had a building of its own.
+    """
+    r = rnd.Random(seed)
+
+    meeting_times = [
+        MeetingTime(pid=f"{d}{slot}", day=day, time=slot)
+        for d, day in enumerate(DAYS)
+        for slot in SLOTS
+    ]
+    depts = [Department(pk=d, dept_name=f"Department {d}") for d in range(1, departments + 1)]
+
+    def owner(n):
+        return depts[(n - 1) % departments] if own_rooms else None
+
+    rooms = (
+        [Room(pk=n, r_number=f"R{n}", room_type="Lecture Hall", department=owner(n))
+         for n in range(1, lecture_rooms + 1)] +
+        [Room(pk=lecture_rooms + n, r_number=f"LAB{n}", room_type="Lab", department=owner(n))
+         for n in range(1, lab_rooms + 1)]
+    )
+
+    instructors, courses = [], []
+    course_instructors, dept_courses = {}, {}
+
+    for d, dept in enumerate(depts, 1):
+        pool = []
+        for _ in range(instructors_per_dept):
+            n = len(instructors) + 1
+            instructor = Instructor(pk=n, uid=f"I{n}", name=f"Instructor {n}")
+            instructors.append(instructor)
+            pool.append(instructor)
+
+        dept_courses[dept.pk] = []
+        for c in range(courses_per_dept + lab_courses_per_dept):
+            is_lab = c >= courses_per_dept
+            course = Course(
+                course_number=f"{d}{c:03d}",
+                course_name=f"{'Lab' if is_lab else 'Course'} {d}.{c}",
+                max_numb_students="60",
+                room_required="Lab" if is_lab else "Lecture Hall",
+            )
+            courses.append(course)
+            dept_courses[dept.pk].append(course.pk)
+            k = min(instructors_per_course, len(pool))
+            course_instructors[course.pk] = [i.pk for i in r.sample(pool, k)]
+
+    section_list = [
+        Section(section_id=f"S{n:03d}", department=depts[n % departments],
+                num_class_in_week=classes_per_week)
+        for n in range(sections)
+    ]
+
+    return ProblemSnapshot(
+        rooms=rooms,
+        meeting_times=meeting_times,
+        instructors=instructors,
+        courses=courses,
+        depts=depts,
+        sections=section_list,
+        course_instructors=course_instructors,
+        dept_courses=dept_courses,
+    )
@@ -1,4 +1,894 @@
-from django.test import TestCase
+import csv
+import datetime
+import importlib.util
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
 
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from . import exports, jobs, pdf, solvers, synthetic, views
+from .models import (PROBLEM_HASH_CACHE_KEY, Course, Department, GeneratedTimetable,
+                     GenerationJob, Instructor, MeetingTime, Room, Section)
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+# The suite clears and fills the cache, so it gets one of its own rather
+# than the deployment cache of settings.CACHES.
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                       "LOCATION": "ttgen-tests"}})
+class TtgenTestCase(TestCase):
+    pass
+
+
+def make_problem(n_sections=2, classes_per_week=6):
+    for d, day in enumerate(DAYS):
+        for slot in range(1, 10):
+            MeetingTime.objects.create(pid=f"{d}{slot}", day=day, time=str(slot))
+
+    Room.objects.create(r_number="L1", room_type="Lecture Hall")
+    Room.objects.create(r_number="L2", room_type="Lecture Hall")
+    Room.objects.create(r_number="LAB1", room_type="Lab")
+
+    alice = Instructor.objects.create(uid="I1", name="Alice")
+    bob = Instructor.objects.create(uid="I2", name="Bob")
+    carol = Instructor.objects.create(uid="I3", name="Carol")
+
+    maths = Course.objects.create(course_number="C1", course_name="Maths", max_numb_students="60")
+    maths.instructors.set([alice, bob])
+    physics = Course.objects.create(course_number="C2", course_name="Physics", max_numb_students="60")
+    physics.instructors.set([bob])
+    lab = Course.objects.create(course_number="C3", course_name="Physics Lab",
+                                max_numb_students="30", room_required="Lab")
+    lab.instructors.set([carol])
+
+    dept = Department.objects.create(dept_name="Science")
+    dept.courses.set([maths, physics, lab])
+
+    for i in range(n_sections):
+        Section.objects.create(section_id=f"S{i}", department=dept,
+                               num_class_in_week=classes_per_week)
+
+
+class ProblemSnapshotTests(TtgenTestCase):
+    def setUp(self):
+        make_problem()
+
+    def _queries_for_generations(self, generations):
+        with CaptureQueriesContext(connection) as ctx:
+            views.data = views.ProblemSnapshot.load()
+            population = views.Population(views.POPULATION_SIZE)
+            ga = views.GeneticAlgorithm()
+            for _ in range(generations):
+                population = ga.evolve(population)
+                population.sort()
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_generations(self):
+        self.assertEqual(self._queries_for_generations(1), self._queries_for_generations(10))
+
+    def test_ga_runs_without_queries_once_loaded(self):
+        views.data = views.ProblemSnapshot.load()
+        with self.assertNumQueries(0):
+            population = views.Population(views.POPULATION_SIZE)
+            views.GeneticAlgorithm().evolve(population)
+
+
+def legacy_conflicts(schedule):
+    """The original pairwise calculate_fitness, kept as a reference."""
+    conflicts = 0
+    classes, labs = schedule.get_classes(), schedule.get_labs()
+
+    for i, c1 in enumerate(classes):
+        for c2 in classes[i+1:]:
+            if (c1.meeting_time.day == c2.meeting_time.day and
+                    c1.meeting_time.time == c2.meeting_time.time):
+                if c1.section == c2.section: conflicts += 1
+                if c1.room == c2.room: conflicts += 1
+                if c1.instructor == c2.instructor: conflicts += 1
+
+    for i, l1 in enumerate(labs):
+        for l2 in labs[i+1:]:
+            for mt in l1.meeting_times:
+                if mt in l2.meeting_times:
+                    if l1.section == l2.section: conflicts += 1
+                    if l1.room == l2.room: conflicts += 1
+                    if l1.instructor == l2.instructor: conflicts += 1
+
+    for lab in labs:
+        for cls in classes:
+            if cls.meeting_time in lab.meeting_times:
+                if cls.section == lab.section: conflicts += 1
+                if cls.room == lab.room: conflicts += 1
+                if cls.instructor == lab.instructor: conflicts += 1
+
+    return conflicts
+
+
+def random_gene(rng, g):
+    """A random (time, room, instructor) for gene g, ignoring conflicts."""
+    data = views.data
+    return (rng.randrange(len(data.gene_blocks[g])),
+            rng.randrange(data.numb_rooms),
+            rng.randrange(data.numb_instructors))
+
+
+def random_schedule(rng, placed):
+    """A schedule with about ``placed`` of its genes placed at random."""
+    data = views.data
+    schedule = views.Schedule()
+    for g in range(data.numb_genes):
+        if rng.random() < placed:
+            schedule.set_gene(g, *random_gene(rng, g))
+    return schedule
+
+
+class FitnessTests(TtgenTestCase):
+    def setUp(self):
+        make_problem(n_sections=4, classes_per_week=15)
+        views.data = views.ProblemSnapshot.load()
+
+    def test_matches_pairwise_implementation(self):
+        rng = random.Random(1234)
+        for _ in range(50):
+            schedule = random_schedule(rng, rng.random())
+            schedule.calculate_fitness()
+            self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+
+    def test_moves_keep_conflict_count_current(self):
+        rng = random.Random(99)
+        schedule = random_schedule(rng, 0.8)
+
+        for _ in range(200):
+            g = rng.randrange(views.data.numb_genes)
+            gene = random_gene(rng, g) if rng.random() < 0.9 else (views.UNPLACED,) * 3
+            schedule.set_gene(g, *gene)
+            self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+            self.assertEqual(schedule.get_numb_of_unplaced(), len(schedule.get_unplaced()))
+
+    def test_construction_places_no_conflicting_genes(self):
+        for _ in range(20):
+            schedule = views.Schedule().initialize()
+            self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+            self.assertEqual(legacy_conflicts(schedule), 0)
+
+
+    def test_batch_fitness_matches_scalar(self):
+        rng = random.Random(7)
+        population = views.Population(0)
+        for _ in range(12):
+            population.add_schedule(random_schedule(rng, rng.random()))
+
+        batch = list(population.evaluate_all())
+
+        self.assertEqual(batch, [s.calculate_fitness() for s in population.get_schedules()])
+
+
+class ConstructionTests(TtgenTestCase):
+    def setUp(self):
+        make_problem()
+
+    def test_unplaceable_gene_is_reported(self):
+        Room.objects.filter(room_type="Lab").delete()
+        views.data = views.ProblemSnapshot.load()
+
+        schedule = views.Schedule().initialize()
+
+        self.assertEqual(schedule.get_labs(), [])
+        self.assertEqual([reason for _, reason in schedule.get_unplaced()],
+                         ["no room of the required type"] * 2)
+        # No conflicts, but the two missing labs still cost fitness.
+        self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+        self.assertEqual(schedule.get_fitness(), 1 / 3)
+        with patch.object(views, "UNPLACED_PENALTY", 2):
+            population = views.Population(0)
+        population.add_schedule(schedule.copy(population._params))
+        self.assertEqual(list(population.evaluate_all()), [1 / 5])
+
+    def test_feasible_sampling_only_fails_on_real_shortages(self):
+        # Rooms and section slots suffice for 2 x 20 classes; only Bob,
+        # the sole Physics instructor, can run out.
+        Section.objects.update(num_class_in_week=20)
+        views.data = views.ProblemSnapshot.load()
+
+        for _ in range(5):
+            schedule = views.Schedule().initialize("feasible")
+            self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+            self.assertTrue(all("instructor" in reason for _, reason in schedule.get_unplaced()))
+
+
+    def test_dsatur_places_labs_in_lab_blocks_without_conflicts(self):
+        views.data = views.ProblemSnapshot.load()
+        d = views.data
+
+        self.assertEqual(d.gene_degree[d.lab_genes[0]],
+                         len(d.section_genes[0]) - 1 + len(d.lab_genes) - 1)
+
+        population = views.Population(3, strategy="dsatur")
+        for schedule in population.get_schedules():
+            self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+            self.assertEqual(schedule.get_unplaced(), [])
+            for lab in schedule.get_labs():
+                self.assertEqual(len(lab.meeting_times), views.LAB_DURATION)
+                self.assertIn(lab.meeting_times[0].time, views.VALID_LAB_START_SLOTS)
+
+class GeneticAlgorithmTests(TtgenTestCase):
+    def setUp(self):
+        make_problem(n_sections=4, classes_per_week=15)
+        views.data = views.ProblemSnapshot.load()
+
+    def test_crossover_child_owns_its_genes(self):
+        s1, s2 = views.Schedule().initialize(), views.Schedule().initialize()
+        before = [list(a) for a in s1.get_chromosome() + s2.get_chromosome()]
+
+        child = views.GeneticAlgorithm()._crossover(s1, s2)
+        for g in range(views.data.numb_genes):
+            child.set_gene(g, views.UNPLACED, views.UNPLACED, views.UNPLACED)
+
+        self.assertEqual([list(a) for a in s1.get_chromosome() + s2.get_chromosome()], before)
+
+    def test_repair_removes_avoidable_conflicts(self):
+        rng = random.Random(5)
+        schedule = random_schedule(rng, 1.0)
+        self.assertGreater(schedule.get_numb_of_conflicts(), 0)
+
+        schedule.repair()
+
+        self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+        self.assertLess(schedule.get_numb_of_conflicts(), 5)
+
+    def test_mutation_operators_keep_conflict_count_current(self):
+        random.seed(3)
+        schedule = random_schedule(random.Random(3), 1.0)
+
+        for _ in range(30):
+            conflicted = schedule.get_conflicted()
+            schedule.swap_classes(conflicted)
+            schedule.shift_lab(conflicted)
+            if conflicted:
+                schedule.relocate(random.choice(conflicted))
+            self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+
+    def test_relocate_reports_whether_the_gene_changed(self):
+        random.seed(8)
+        clean = views.Schedule().initialize()
+        g = next(g for g in range(views.data.numb_genes) if clean.get_gene(g)[0] != views.UNPLACED)
+        self.assertFalse(clean.relocate(g))
+
+        # with nowhere free, conflicting genes move to their cheapest spot
+        schedule = random_schedule(random.Random(8), 1.0)
+        before = schedule.get_numb_of_conflicts()
+        with patch.object(views.Schedule, "_sample_free", return_value=(None, "full")), \
+                patch.object(views.Schedule, "_free_at_same_time", return_value=None):
+            for g in schedule.get_conflicted():
+                conflicts = schedule.get_numb_of_conflicts()
+                moved = schedule.relocate(g)
+                self.assertEqual(moved, schedule.get_numb_of_conflicts() < conflicts)
+        self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+        self.assertLess(schedule.get_numb_of_conflicts(), before)
+
+    def test_local_search_never_returns_a_worse_schedule(self):
+        for method in ("anneal", "tabu"):
+            random.seed(4)
+            schedule = random_schedule(random.Random(4), 1.0)
+            start = schedule.get_numb_of_conflicts()
+
+            best = views.LocalSearch(method, budget=0.5).run(schedule)
+
+            self.assertEqual(best.get_numb_of_conflicts(), legacy_conflicts(best))
+            self.assertLess(best.get_numb_of_conflicts(), start)
+            self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+            self.assertGreaterEqual(schedule.get_numb_of_conflicts(), best.get_numb_of_conflicts())
+
+    def test_search_stops_at_the_deadline(self):
+        random.seed(4)
+        schedule = random_schedule(random.Random(4), 1.0)
+        chromosome = schedule.get_chromosome()
+
+        best = views.LocalSearch("tabu", budget=60).run(schedule, deadline=0)
+        self.assertIs(best, schedule)
+        self.assertEqual(best.get_chromosome(), chromosome)
+
+        population = views.Population(0)
+        for n in range(views.POPULATION_SIZE):
+            population.add_schedule(random_schedule(random.Random(n), 1.0))
+        self.assertIs(views.GeneticAlgorithm(deadline=0).evolve(population), population)
+
+        members, ran = views._evolve_island((None, 5, 2, 0, None))
+        self.assertEqual((len(members), ran), (views.POPULATION_SIZE, 0))
+
+    def test_memetic_generation_searches_the_elite(self):
+        random.seed(6)
+        population = views.Population(0)
+        for n in range(views.POPULATION_SIZE):
+            population.add_schedule(random_schedule(random.Random(n), 1.0))
+        elite = population.sort().get_schedules()[0]
+
+        with patch.object(views, "LOCAL_SEARCH", "tabu"), patch.object(views, "REPAIR_CHILDREN", False), \
+                patch.object(views, "MUTATION_RATES", dict.fromkeys(views.MUTATION_RATES, 0)):
+            evolved = views.GeneticAlgorithm().evolve(population).get_schedules()[0]
+
+        self.assertLess(evolved.get_numb_of_conflicts(), elite.get_numb_of_conflicts())
+
+    def test_warm_start_seeds_part_of_the_population(self):
+        random.seed(2)
+        previous = views.Schedule().initialize()
+        genes = [previous.get_gene(g) for g in range(views.data.numb_genes)]
+
+        with patch.object(views, "WARM_START_FRACTION", 0.5), \
+                patch.object(views, "WARM_START_PERTURBATION", 0.25):
+            schedules = views.Population(10, warm_start=previous).get_schedules()
+
+        self.assertEqual(len(schedules), 10)
+        self.assertEqual([schedules[0].get_gene(g) for g in range(views.data.numb_genes)], genes)
+        for schedule in schedules[1:5]:
+            self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+            # a few sampled genes have no other free block on this tight instance
+            moved = sum(schedule.get_gene(g)[0] != gene[0] for g, gene in enumerate(genes))
+            self.assertLessEqual(moved, round(len(genes) * 0.25))
+            self.assertGreaterEqual(moved, round(len(genes) * 0.25) * 0.6)
+
+    @override_settings(TTGEN_WORKERS=1)
+    def test_single_worker_runs_in_process(self):
+        self.assertIsNone(views.worker_pool())
+
+    def test_worker_pool_returns_consistent_schedules(self):
+        pool = views.worker_pool(2)
+        try:
+            population = views.Population(views.POPULATION_SIZE, pool).sort()
+            population = views.GeneticAlgorithm(pool).evolve(population)
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(len(population.get_schedules()), views.POPULATION_SIZE)
+        for schedule in population.get_schedules():
+            self.assertEqual(schedule.get_numb_of_conflicts(), legacy_conflicts(schedule))
+
+    def test_islands_exchange_their_best_schedules(self):
+        model = views.IslandModel(islands=3, migrants=1)
+        islands = [[(f"best{n}", {}, 1.0), (f"mid{n}", {}, 0.5), (f"worst{n}", {}, 0.1)]
+                   for n in range(3)]
+
+        model._migrate(islands)
+
+        self.assertEqual([[m[0] for m in members] for members in islands],
+                         [["best0", "best2", "mid0"],
+                          ["best1", "best0", "mid1"],
+                          ["best2", "best1", "mid2"]])
+
+    def test_island_model_returns_best_across_islands(self):
+        rng = random.Random(11)
+        populations = []
+        for _ in range(2):
+            population = views.Population(0)
+            for _ in range(views.POPULATION_SIZE):
+                population.add_schedule(random_schedule(rng, 1.0))
+            populations.append(population)
+
+        best, gen = views.IslandModel(islands=2, interval=2).run(4, 1, populations)
+
+        self.assertLessEqual(gen, 4)
+        self.assertEqual(best.get_numb_of_conflicts(), legacy_conflicts(best))
+
+
+class SolverEngineTests(TtgenTestCase):
+    def setUp(self):
+        make_problem(n_sections=4, classes_per_week=15)
+
+    def test_backtracking_places_every_gene_without_conflicts(self):
+        solution = solvers.solve(views.ProblemSnapshot.load(), engine="backtracking")
+
+        self.assertEqual(solution.stats["outcome"], "solved")
+        self.assertEqual((solution.conflicts, solution.unplaced), (0, 0))
+        self.assertEqual(legacy_conflicts(solution.schedule), 0)
+
+    def test_backtracking_proves_infeasibility(self):
+        Section.objects.filter(section_id="S0").update(num_class_in_week=40)
+
+        solution = solvers.solve(views.ProblemSnapshot.load(), engine="backtracking")
+
+        self.assertTrue(solution.proved_infeasible)
+        self.assertIn("section S0 needs 44 slots", solution.reason)
+        self.assertEqual(solution.conflicts, 0)
+
+    def test_engines_stop_at_the_deadline(self):
+        snapshot = views.ProblemSnapshot.load()
+        solution = solvers.solve(snapshot, {"MAX_NODES": 10}, engine="backtracking")
+        self.assertEqual(solution.stats["outcome"], "max nodes")
+        self.assertEqual(solution.conflicts, 0)
+
+        solution = solvers.solve(snapshot, {"FITNESS_THRESHOLD": 2}, deadline=0, engine="ga")
+        self.assertTrue(solution.stopped_by_deadline)
+        self.assertEqual(views.FITNESS_THRESHOLD, 0.90)
+
+    def test_engine_is_part_of_the_fingerprint(self):
+        self.assertNotEqual(views.current_fingerprint("ga"), views.current_fingerprint("backtracking"))
+        with self.assertRaises(ValueError):
+            solvers.solve(views.ProblemSnapshot.load(), {"POPULATION": 3}, engine="ga")
+
+    def test_ga_params_apply_to_their_run_only(self):
+        fingerprint = views.current_fingerprint("ga")
+        seen = []
+
+        def report(gen, best):
+            seen.append((best._params["POPULATION_SIZE"], views.POPULATION_SIZE,
+                         views.current_fingerprint("ga")))
+
+        solvers.solve(views.ProblemSnapshot.load(),
+                      {"POPULATION_SIZE": 3, "MAX_GEN": 1, "FITNESS_THRESHOLD": 2},
+                      engine="ga", decompose=False, report=report)
+
+        self.assertTrue(seen)
+        for size, module_size, during in seen:
+            self.assertEqual((size, module_size, during), (3, 9, fingerprint))
+        self.assertEqual(views.current_fingerprint("ga"), fingerprint)
+
+
+class DecompositionTests(TtgenTestCase):
+    def _snapshot(self, own_rooms):
+        return synthetic.make_snapshot(sections=6, departments=2, classes_per_week=10,
+                                       lecture_rooms=4, lab_rooms=2, own_rooms=own_rooms)
+
+    def test_component_progress_counts_generations_over_components(self):
+        snapshot = self._snapshot(own_rooms=True)
+        reports = []
+        solvers.solve(snapshot, {"FITNESS_THRESHOLD": 2, "MAX_GEN": 2}, engine="ga",
+                      report=lambda gen, best: reports.append((gen, best.get_fitness())))
+
+        self.assertEqual([gen for gen, _ in reports], [0, 1, 2, 2, 3, 4, 4])
+        self.assertTrue(all(fitness is not None for _, fitness in reports))
+
+    def test_departments_with_own_rooms_are_separate_components(self):
+        self.assertEqual(len(self._snapshot(own_rooms=False).components()), 1)
+
+        snapshot = self._snapshot(own_rooms=True)
+        components = snapshot.components()
+        self.assertEqual([len(c) for c in components], [3, 3])
+        for sections in components:
+            depts = {snapshot.get_sections()[s].department_id for s in sections}
+            self.assertEqual(len(depts), 1)
+            sub = snapshot.subproblem(sections)
+            self.assertEqual(sub.numb_genes, sum(len(snapshot.section_genes[s]) for s in sections))
+            self.assertEqual({r.department_id for r in sub.get_rooms()}, depts)
+
+    def test_components_are_solved_and_merged(self):
+        snapshot = self._snapshot(own_rooms=True)
+        for workers in (1, 2):
+            reports = []
+            with self.subTest(workers=workers), override_settings(TTGEN_COMPONENT_WORKERS=workers):
+                solution = solvers.solve(snapshot, engine="backtracking",
+                                         report=lambda gen, best: reports.append((gen, best)))
+
+            # progress is on the whole problem, as components finish
+            self.assertGreaterEqual(len(reports), 2)
+            self.assertTrue(all(best._data is snapshot for _, best in reports))
+            self.assertEqual([gen for gen, _ in reports], sorted(gen for gen, _ in reports))
+            self.assertLess(len(reports[0][1].get_meetings()), len(reports[-1][1].get_meetings()))
+
+            schedule = solution.schedule
+            self.assertIs(views.data, snapshot)
+            self.assertEqual(len(solution.stats["components"]), 2)
+            self.assertEqual((solution.conflicts, solution.unplaced), (0, 0))
+            for g in range(snapshot.numb_genes):
+                room = snapshot.get_rooms()[schedule.get_gene(g)[1]]
+                section = snapshot.get_sections()[snapshot.gene_section[g]]
+                self.assertEqual(room.department_id, section.department_id)
+
+
+@override_settings(TTGEN_JOB_RUNNER="command")
+class GenerationJobTests(TtgenTestCase):
+    def setUp(self):
+        cache.clear()
+        make_problem()
+        user = User.objects.create_user("admin", password="secret")
+        self.client.force_login(user)
+
+    def _start(self):
+        response = self.client.post(reverse('startjob'))
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def test_start_returns_at_once(self):
+        job = self._start()
+
+        self.assertEqual(job["status"], GenerationJob.QUEUED)
+        self.assertEqual(self.client.get(job["status_url"]).json()["status"], GenerationJob.QUEUED)
+        self.assertEqual(self.client.get(job["result_url"]).status_code, 409)
+
+    def test_worker_runs_job_to_a_result(self):
+        job = self._start()
+
+        self.assertEqual(jobs.claim_next(), job["id"])
+        jobs.run_job(job["id"])
+        self.assertIsNone(jobs.claim_next())
+
+        status = self.client.get(job["status_url"]).json()
+        self.assertEqual(status["status"], GenerationJob.DONE)
+        self.assertEqual(status["conflicts"], 0)
+
+        result = self.client.get(job["result_url"]).json()
+        self.assertEqual(result["version"], 1)
+        self.assertEqual(len(result["meetings"]), views.data.numb_genes - len(result["unplaced"]))
+
+        page = self.client.get(status["timetable_url"])
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(len(page.context["tables"]), 2)
+
+    def test_job_returns_best_so_far_at_its_time_limit(self):
+        self.assertEqual(self.client.post(reverse('startjob'), {"time_limit": "0"}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('startjob'), {"time_limit": "x"}).status_code, 400)
+
+        job = self.client.post(reverse('startjob'), {"time_limit": "0.01"}).json()
+        self.assertEqual(job["time_limit"], 0.01)
+        with patch.object(views, "FITNESS_THRESHOLD", 2):
+            jobs.run_job(jobs.claim_next())
+
+        status = self.client.get(job["status_url"]).json()
+        self.assertEqual(status["status"], GenerationJob.DONE)
+        self.assertTrue(status["stopped_by_deadline"])
+        self.assertIsNotNone(status["conflicts"])
+        # a partial result is never served from the cache
+        self.assertEqual(GeneratedTimetable.objects.get().fingerprint, "")
+        self.assertFalse(self._start()["from_cache"])
+
+    def test_timetable_without_jobs_redirects_to_generate(self):
+        self.assertRedirects(self.client.get(reverse('timetable')), reverse('generate'),
+                             fetch_redirect_response=False)
+
+
+class StoredTimetableTests(TtgenTestCase):
+    def setUp(self):
+        cache.clear()
+        make_problem()
+        views.data = views.ProblemSnapshot.load()
+
+    def test_versions_are_numbered_in_order(self):
+        first = views.save_timetable(views.Schedule().initialize())
+        second = views.save_timetable(views.Schedule().initialize())
+
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertEqual(views.latest_timetable(), second)
+
+    def test_version_taken_by_a_concurrent_save_is_retried(self):
+        views.save_timetable(views.Schedule().initialize())
+        # As if another job had stored version 1 after this one read the maximum.
+        schedule = views.Schedule().initialize()
+        with patch.object(views, "_next_version", side_effect=[1, 2]):
+            timetable = views.save_timetable(schedule)
+
+        self.assertEqual(timetable.version, 2)
+        self.assertEqual(timetable.meetings.count(), len(schedule.get_meetings()))
+
+    def test_saved_meetings_render_like_the_schedule(self):
+        schedule = views.Schedule().initialize()
+        timetable = views.save_timetable(schedule)
+
+        def cells(tables):
+            return [[(c["type"], [(cls.course.pk, cls.room.pk, cls.instructor.pk) for cls in c["classes"]],
+                      c["lab"] and (c["lab"].course.pk, c["lab"].room.pk, c["lab"].instructor.pk))
+                     for row in t["rows"] for c in row["cells"]] for t in tables]
+
+        expected = views.build_tables(views.data.get_sections(), schedule.get_labs(), schedule.get_classes())
+        self.assertEqual(cells(views.load_tables(timetable)), cells(expected))
+
+    def test_grid_shows_every_meeting_at_its_slot(self):
+        schedule = views.Schedule().initialize()
+        labs, classes = schedule.get_labs(), schedule.get_classes()
+
+        shown = []
+        for table in views.build_tables(views.data.get_sections(), labs, classes):
+            for row in table["rows"]:
+                slot = 1
+                for cell in row["cells"]:
+                    for gene in cell["classes"]:
+                        self.assertEqual((gene.meeting_time.day, gene.meeting_time.time),
+                                         (row["day"], str(slot)))
+                    if cell["lab"]:
+                        self.assertEqual(cell["lab"].meeting_times[0].time, str(slot))
+                    shown += cell["classes"] + [cell["lab"]] * bool(cell["lab"])
+                    slot += cell["colspan"]
+
+        self.assertCountEqual(shown, labs + classes)
+
+    def test_page_reads_latest_version_in_a_few_queries(self):
+        views.save_timetable(views.Schedule().initialize())
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('timetable'))
+        self.assertEqual(response.context["timetable"].version, 1)
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse('timetable'))
+
+    def test_unknown_or_malformed_version_is_not_found(self):
+        views.save_timetable(views.Schedule().initialize())
+        for version in ("2", "abc", "1.5"):
+            self.assertEqual(self.client.get(reverse('timetable'), {"version": version}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('timetable'), {"version": "1"}).status_code, 200)
+
+    def test_reused_version_number_is_not_served_from_the_cache(self):
+        timetable = views.save_timetable(views.Schedule().initialize())
+        views.timetable_views(timetable)
+
+        # As after a database reset: same pk and version, other data.
+        Department.objects.update(dept_name="CSE")
+        timetable.created_at += datetime.timedelta(days=1)
+
+        titles = [t["title"] for t in views.timetable_views(timetable)["section"]]
+        self.assertEqual(titles, ["S0 (CSE)", "S1 (CSE)"])
+
+    def test_views_by_instructor_room_and_department(self):
+        schedule = views.Schedule().initialize()
+        views.save_timetable(schedule)
+        placed = len(schedule.get_labs()) + len(schedule.get_classes())
+
+        def count(tables):
+            return sum(bool(c["lab"]) + len(c["classes"])
+                       for t in tables for row in t["rows"] for c in row["cells"])
+
+        for name in ('instructortimetables', 'roomtimetables', 'sectiontimetables'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(count(response.context["tables"]), placed)
+
+        bob = Instructor.objects.get(name="Bob")
+        tables = self.client.get(reverse('instructortimetable', args=[bob.pk])).context["tables"]
+        self.assertEqual([t["owner"] for t in tables], [bob])
+        self.assertTrue(all(cls.instructor == bob for cell in
+                            (c for row in tables[0]["rows"] for c in row["cells"])
+                            for cls in cell["classes"]))
+
+        dept = Department.objects.get()
+        response = self.client.get(reverse('departmenttimetable', args=[dept.pk]))
+        self.assertEqual(count(response.context["tables"][0]["tables"]), placed)
+        self.assertContains(response, "S1")
+
+        self.assertEqual(self.client.get(reverse('roomtimetable', args=[999])).status_code, 404)
+
+
+class PdfExportTests(TtgenTestCase):
+    def setUp(self):
+        cache.clear()
+        make_problem()
+        views.data = views.ProblemSnapshot.load()
+        self.timetable = views.save_timetable(views.Schedule().initialize())
+        self.enterContext(self.settings(TTGEN_PDF_DIR=self.enterContext(tempfile.TemporaryDirectory())))
+
+    def _cache_fake_pdfs(self, timetable):
+        os.makedirs(pdf.sections_dir(timetable))
+        for section in Section.objects.all():
+            with open(pdf.section_path(timetable, section.pk), "wb") as f:
+                f.write(f"%PDF {section.pk}".encode() * 5000)
+
+    def test_cache_is_keyed_by_version(self):
+        second = views.save_timetable(views.Schedule().initialize())
+        self.assertNotEqual(pdf.cache_dir(self.timetable), pdf.cache_dir(second))
+
+    def test_archive_streams_cached_section_pdfs(self):
+        self._cache_fake_pdfs(self.timetable)
+
+        response = self.client.get(reverse('pdfarchive'))
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            self.assertEqual(sorted(archive.namelist()), ["S0.pdf", "S1.pdf"])
+            self.assertEqual(archive.read("S1.pdf"), b"%PDF S1" * 5000)
+
+    def test_section_pdf_is_served_from_the_cache(self):
+        self._cache_fake_pdfs(self.timetable)
+
+        response = self.client.get(reverse('sectionpdf', args=["S0"]))
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF S0" * 5000)
+        self.assertEqual(self.client.get(reverse('sectionpdf', args=["S9"])).status_code, 404)
+
+    @unittest.skipUnless(importlib.util.find_spec("xhtml2pdf"), "xhtml2pdf is not installed")
+    def test_sections_are_rendered_in_a_pool(self):
+        paths = pdf.section_pdfs(self.timetable, workers=2)
+
+        self.assertEqual(sorted(paths), ["S0", "S1"])
+        for path in paths.values():
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(4), b"%PDF")
+
+
+class ExportTests(TtgenTestCase):
+    def setUp(self):
+        cache.clear()
+        make_problem()
+        views.data = views.ProblemSnapshot.load()
+        self.timetable = views.save_timetable(views.Schedule().initialize())
+
+    def _export(self, fmt, **params):
+        response = self.client.get(reverse('exporttimetable', args=[fmt]), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_streams_every_meeting_in_chunks(self):
+        with patch.object(exports, "EXPORT_CHUNK_SIZE", 5):
+            chunks = list(exports.csv_export(self.timetable))
+        self.assertGreater(len(chunks), 2)
+
+        rows = list(csv.DictReader(io.StringIO(self._export("csv"))))
+        self.assertEqual(len(rows), self.timetable.meetings.count())
+        lab = next(r for r in rows if r["is_lab"] == "True")
+        self.assertEqual(lab["duration"], str(views.LAB_DURATION))
+        self.assertEqual((lab["start"], lab["end"]),
+                         {"1": ("08:30", "12:30"), "6": ("13:30", "17:30")}[lab["slot"]])
+
+    def test_jsonl_filters_by_section_instructor_and_room(self):
+        rows = [json.loads(line) for line in self._export("jsonl", section="S1").splitlines()]
+        self.assertEqual(len(rows), self.timetable.meetings.filter(section="S1").count())
+        self.assertEqual({r["section"] for r in rows}, {"S1"})
+
+        bob = Instructor.objects.get(name="Bob")
+        lab_room = Room.objects.get(r_number="LAB1")
+        rows = [json.loads(line) for line in
+                self._export("jsonl", instructor=bob.pk, room=lab_room.pk).splitlines()]
+        self.assertEqual(rows, [])
+
+        for fmt in ("csv", "jsonl"):
+            for params in ({"instructor": "bob"}, {"room": [lab_room.pk, "LAB1"]}):
+                response = self.client.get(reverse('exporttimetable', args=[fmt]), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_ics_has_a_weekly_event_per_meeting(self):
+        ics = self._export("ics", start="2026-01-05", section="S0")
+
+        self.assertTrue(ics.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertTrue(ics.endswith("END:VCALENDAR\r\n"))
+        self.assertEqual(ics.count("BEGIN:VEVENT"),
+                         self.timetable.meetings.filter(section="S0").count())
+        self.assertEqual(ics.count("RRULE:FREQ=WEEKLY"), ics.count("BEGIN:VEVENT"))
+
+        meeting = self.timetable.meetings.filter(section="S0", is_lab=False) \
+            .select_related('meeting_time').first()
+        day = 5 + exports.WEEKDAYS.index(meeting.meeting_time.day)
+        start, _ = exports.slot_times(meeting.meeting_time.time)
+        self.assertIn(f"UID:ttgen-v1-{meeting.pk}\r\n", ics)
+        self.assertIn(f"DTSTART:202601{day:02d}T{start:%H%M%S}", ics)
+
+        self.assertEqual(self.client.get(reverse('exporttimetable', args=["ics"]),
+                                         {"start": "soon"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('exporttimetable', args=["xml"])).status_code, 404)
+
+
+@override_settings(TTGEN_JOB_RUNNER="command")
+class FingerprintCacheTests(TtgenTestCase):
+    def setUp(self):
+        cache.clear()
+        make_problem()
+
+    def _solve(self):
+        job = jobs.start_job()
+        jobs.run_job(jobs.claim_next())
+        job.refresh_from_db()
+        return job
+
+    def test_unchanged_data_is_served_from_cache(self):
+        solved = self._solve()
+
+        with self.assertNumQueries(2):  # timetable lookup, job insert
+            job = jobs.start_job()
+
+        self.assertTrue(job.from_cache)
+        self.assertEqual(job.status, GenerationJob.DONE)
+        self.assertEqual(job.timetable, solved.timetable)
+
+    def test_data_changes_clear_the_problem_hash(self):
+        views.current_fingerprint()
+        Room.objects.create(r_number="L3", room_type="Lecture Hall")
+        self.assertIsNone(cache.get(PROBLEM_HASH_CACHE_KEY))
+
+        views.current_fingerprint()
+        Course.objects.get(course_name="Physics").instructors.add(Instructor.objects.get(name="Alice"))
+        self.assertIsNone(cache.get(PROBLEM_HASH_CACHE_KEY))
+
+    def test_jobs_run_the_engine_they_were_started_with(self):
+        user = User.objects.create_user("admin", password="secret")
+        self.client.force_login(user)
+        self.assertEqual(self.client.post(reverse('startjob'), {"engine": "sat"}).status_code, 400)
+
+        response = self.client.post(reverse('startjob'), {"engine": "backtracking"})
+        self.assertEqual(response.json()["engine"], "backtracking")
+        jobs.run_job(jobs.claim_next())
+
+        job = GenerationJob.objects.get(pk=response.json()["id"])
+        self.assertEqual((job.status, job.conflicts), (GenerationJob.DONE, 0))
+        self.assertTrue(jobs.start_job(engine="backtracking").from_cache)
+        self.assertFalse(jobs.start_job(engine="ga").from_cache)
+
+    def test_changed_problem_or_parameters_are_solved_again(self):
+        self._solve()
+        before = views.current_fingerprint()
+
+        Section.objects.update(num_class_in_week=5)  # no signals for update()
+        cache.clear()
+        self.assertNotEqual(views.current_fingerprint(), before)
+        self.assertEqual(jobs.start_job().status, GenerationJob.QUEUED)
+
+        Section.objects.update(num_class_in_week=6)
+        cache.clear()
+        self.assertEqual(views.current_fingerprint(), before)
+        with patch.object(views, "POPULATION_SIZE", 12):
+            self.assertNotEqual(views.current_fingerprint(), before)
+
+
+class RepairTests(TtgenTestCase):
+    def setUp(self):
+        make_problem(n_sections=2, classes_per_week=6)
+        views.data = views.ProblemSnapshot.load()
+        self.timetable = views.save_timetable(views.Schedule().initialize())
+
+    def _meetings(self, timetable):
+        return set(timetable.meetings.values_list(
+            'section', 'course', 'room', 'instructor', 'meeting_time', 'is_lab'))
+
+    def _repair(self):
+        views.data = views.ProblemSnapshot.load()
+        schedule = views.repair_timetable(views.latest_timetable())
+        self.assertEqual(schedule.get_numb_of_conflicts(), 0)
+        return self._meetings(views.save_timetable(schedule))
+
+    def test_deleted_room_moves_only_its_meetings(self):
+        before = self._meetings(self.timetable)
+        room = Room.objects.get(r_number="L1")
+        kept = {m for m in before if m[2] != room.pk}
+
+        room.delete()
+        after = self._repair()
+
+        self.assertTrue(kept <= after)
+        self.assertFalse(any(m[2] == room.pk for m in after))
+        self.assertEqual(len(after), len(before))
+
+    def test_extra_weekly_class_is_added_around_the_rest(self):
+        before = self._meetings(self.timetable)
+
+        Section.objects.filter(section_id="S0").update(num_class_in_week=7)
+        after = self._repair()
+
+        self.assertTrue(before <= after)
+        self.assertEqual(len(after), len(before) + 1)
+
+    @override_settings(TTGEN_JOB_RUNNER="command")
+    def test_partial_repair_is_not_served_from_the_cache(self):
+        Section.objects.filter(section_id="S0").update(num_class_in_week=40)
+        cache.clear()
+
+        jobs.start_repair()
+        jobs.run_job(jobs.claim_next())
+
+        self.assertTrue(json.loads(views.latest_timetable().unplaced))
+        self.assertEqual(views.latest_timetable().fingerprint, "")
+        self.assertFalse(jobs.start_job().from_cache)
+
+    @override_settings(TTGEN_JOB_RUNNER="command")
+    def test_deleting_a_room_queues_a_repair(self):
+        self.client.force_login(User.objects.create_user("admin", password="secret"))
+        room = Room.objects.get(r_number="L2")
+
+        self.client.post(reverse('deleteroom', args=[room.pk]))
+
+        job = GenerationJob.objects.get()
+        self.assertEqual((job.mode, job.status), (GenerationJob.REPAIR, GenerationJob.QUEUED))
+
+    @override_settings(TTGEN_JOB_RUNNER="command")
+    def test_nothing_is_repaired_before_the_first_timetable(self):
+        self.client.force_login(User.objects.create_user("admin", password="secret"))
+        GeneratedTimetable.objects.all().delete()
+
+        self.client.post(reverse('deleteroom', args=[Room.objects.get(r_number="L2").pk]))
+        self.assertEqual(self.client.post(reverse('startrepair')).status_code, 409)
+
+        self.assertFalse(GenerationJob.objects.exists())
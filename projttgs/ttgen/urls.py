@@ -38,8 +38,23 @@ urlpatterns = [
     path('generate_timetable', views.generate, name='generate'),
 
     path('timetable_generation/', views.timetable, name='timetable'),
+    path('timetable_generation/sections/', views.section_timetable, name='sectiontimetables'),
+    path('timetable_generation/sections/<str:pk>/', views.section_timetable, name='sectiontimetable'),
+    path('timetable_generation/instructors/', views.instructor_timetable, name='instructortimetables'),
+    path('timetable_generation/instructors/<int:pk>/', views.instructor_timetable, name='instructortimetable'),
+    path('timetable_generation/rooms/', views.room_timetable, name='roomtimetables'),
+    path('timetable_generation/rooms/<int:pk>/', views.room_timetable, name='roomtimetable'),
+    path('timetable_generation/departments/', views.department_timetable, name='departmenttimetables'),
+    path('timetable_generation/departments/<int:pk>/', views.department_timetable, name='departmenttimetable'),
+    path('timetable_generation/jobs/', views.start_job, name='startjob'),
+    path('timetable_generation/jobs/repair/', views.start_repair, name='startrepair'),
+    path('timetable_generation/jobs/<int:pk>/', views.job_status, name='jobstatus'),
+    path('timetable_generation/jobs/<int:pk>/result/', views.job_result, name='jobresult'),
     # path('timetable_generation/render/pdf', views.Pdf, name='pdf'),
+    path('timetable_generation/export/<str:fmt>/', views.export_timetable, name='exporttimetable'),
     path('timetable_generation/render/pdf/', views.Pdf.as_view(), name='pdf'),
+    path('timetable_generation/render/pdf/sections/', views.pdf_archive, name='pdfarchive'),
+    path('timetable_generation/render/pdf/sections/<str:pk>/', views.section_pdf, name='sectionpdf'),
 
 
 ]
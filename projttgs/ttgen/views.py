@@ -1,21 +1,110 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.views.decorators.http import require_POST
 from .forms import *
 from .models import *
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.views.generic import View
+import hashlib
+import heapq
+import json
+import logging
+import math
+import multiprocessing
 import random as rnd
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import cached_property
+from time import monotonic
+
+from . import exports, jobs, pdf, solvers
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # batch fitness falls back to the per-schedule counters
+    np = None
 
 # GA PARAMETERS
 # GA PARAMETERS
+# Seed for the random module at the start of a run (None: unseeded).
+# Workers in a pool always reseed themselves.
+SEED = None
+MAX_GEN = 200
+FITNESS_THRESHOLD = 0.90
+# Fitness is 1 / (1 + conflicts + UNPLACED_PENALTY * unplaced genes): a
+# gene left without a place costs as much as that many conflicts.
+UNPLACED_PENALTY = 1
 POPULATION_SIZE = 9
 NUMB_OF_ELITE_SCHEDULES = 1
 TOURNAMENT_SELECTION_SIZE = 3
-MUTATION_RATE = 0.05
+# Mutation operators and their rates:
+#   conflict_move – per conflicting gene: relocate it to a free time/room/instructor
+#   swap_classes  – per child: swap the times of two classes of one section
+#   shift_lab     – per child: move one lab to another block
+#   rebuild       – per child: replace it with a new random schedule (the
+#                   old whole-schedule mutation)
+MUTATION_RATES = {
+    "conflict_move": 0.5,
+    "swap_classes": 0.05,
+    "shift_lab": 0.05,
+    "rebuild": 0.0,
+}
+# Island mode (used when ISLANDS > 1): that many populations of
+# POPULATION_SIZE evolve apart, and every MIGRATION_INTERVAL generations
+# each sends its best MIGRANTS schedules to the next island in a ring.
+ISLANDS = 1
+MIGRATION_INTERVAL = 10
+MIGRANTS = 1
+# Warm start (when a previous timetable is available): this fraction of
+# the initial population is that timetable and copies of it with
+# WARM_START_PERTURBATION of their genes moved to another free block; 0
+# turns it off.
+WARM_START_FRACTION = 0.0
+WARM_START_PERTURBATION = 0.05
+# "uniform": each gene from either parent; "section": each section's genes
+# from one parent
+CROSSOVER_METHOD = "section"
+REPAIR_CHILDREN = True
+
+# Memetic mode: local search on the elite schedule after every generation
+# ("elite") or once on the final best one ("polish"), for at most
+# LOCAL_SEARCH_BUDGET seconds each time. It moves conflicting genes to
+# another block, with that block's least-conflicting room and instructor:
+#   "anneal" – a random block, accepted with probability
+#              exp(-delta / temperature); the temperature starts at
+#              ANNEAL_TEMPERATURE and is multiplied by ANNEAL_COOLING
+#              after every move
+#   "tabu"   – the best block, except ones the gene left in the last
+#              TABU_TENURE moves (unless that gives a new best)
+# None turns it off.
+LOCAL_SEARCH = None
+LOCAL_SEARCH_STAGE = "elite"
+LOCAL_SEARCH_BUDGET = 0.05
+ANNEAL_TEMPERATURE = 1.0
+ANNEAL_COOLING = 0.99
+TABU_TENURE = 20
 
 LAB_DURATION = 4
 
+# How Schedule.initialize() places each gene:
+#   "feasible" – sample uniformly from the conflict-free (slot, room,
+#                instructor) combinations, failing at once if there are none
+#   "random"   – up to MAX_RANDOM_ATTEMPTS blind random tries
+#   "dsatur"   – as "feasible", but labs then classes are placed most
+#                saturated first (see Schedule._construct_dsatur)
+CONSTRUCTION_STRATEGY = "feasible"
+MAX_RANDOM_ATTEMPTS = 50
+# cheap draws "feasible" tries before enumerating the free domain
+FREE_SAMPLE_DRAWS = 8
+
 # Lab blocks: Morning (1–4) OR Afternoon (6–9)
 VALID_LAB_START_SLOTS = ["1", "6"]
 
@@ -23,33 +112,353 @@ VALID_LAB_START_SLOTS = ["1", "6"]
 LUNCH_SLOT = "5"
 
 
-# ---------------- DATA WRAPPER ----------------
+# ---------------- PROBLEM SNAPSHOT ----------------
+
+DAY_ORDER = [day for day, _ in DAYS_OF_WEEK]
+
+# Value stored in a chromosome for a gene that has no place.
+UNPLACED = -1
+
+
+class ProblemSnapshot:
+    """
+    Immutable in-memory copy of everything the GA needs.
+
+    Loaded once per run with a fixed number of queries (see ``load``);
+    Schedule / Population / GeneticAlgorithm only ever read these tables,
+    so the GA itself issues no queries however many generations it runs.
+
+    Alongside the model instances (used only to render a timetable) the
+    snapshot holds a dense integer encoding of the problem. Timeslots,
+    sections, rooms and instructors are numbered 0..n-1, and every gene —
+    one lab, or one weekly class meeting of a section — has a fixed index
+    with its candidate blocks, rooms and instructors. A gene's rooms are
+    the shared rooms of its type plus those of its own department.
+    """
+
+    def __init__(self, rooms, meeting_times, instructors, courses, depts, sections,
+                 course_instructors, dept_courses):
+        """
+        ``course_instructors`` maps course pk -> instructor pks and
+        ``dept_courses`` maps department pk -> course pks, so a snapshot
+        can also be built from unsaved instances (see ttgen/synthetic.py).
+        """
+        self._rooms = tuple(rooms)
+        self._instructors = tuple(instructors)
+        self._courses = tuple(courses)
+        self._depts = tuple(depts)
+        self._sections = tuple(sections)
+        self._course_instructors = course_instructors
+        self._dept_courses = dept_courses
+
+        # One MeetingTime per (day, time) slot, in weekly order; a slot's
+        # index is its position here.
+        slots = {}
+        for mt in sorted(meeting_times, key=self._weekly_order):
+            slots.setdefault((mt.day, mt.time), mt)
+        self._meetingTimes = tuple(slots.values())
+
+        depts_by_pk = {d.pk: d for d in self._depts}
+        self._section_dept = {
+            s.pk: depts_by_pk[s.department_id] for s in self._sections
+        }
+
+        # ---- dense encoding ----
+        self.slots = tuple(slots)
+        self.numb_slots = len(self.slots)
+        self.numb_sections = len(self._sections)
+        self.numb_rooms = len(self._rooms)
+        self.numb_instructors = len(self._instructors)
+
+        instructor_index = {i.pk: n for n, i in enumerate(self._instructors)}
+        course_index = {c.pk: n for n, c in enumerate(self._courses)}
+
+        self.lab_rooms = tuple(n for n, r in enumerate(self._rooms) if r.room_type == "Lab")
+        self.lecture_rooms = tuple(n for n, r in enumerate(self._rooms) if r.room_type != "Lab")
+
+        # A gene's time is an index into its blocks: one slot for a class
+        # (never lunch), LAB_DURATION consecutive slots for a lab.
+        self.class_blocks = tuple(
+            (t,) for t, (_, time) in enumerate(self.slots) if time != LUNCH_SLOT
+        )
+        self.lab_blocks = tuple(
+            block
+            for day in dict.fromkeys(day for day, _ in self.slots)
+            for start in VALID_LAB_START_SLOTS
+            for block in [self._build_lab_block(day, start)]
+            if block
+        )
 
-class Data:
-    def __init__(self):
-        self._rooms = list(Room.objects.all())
-        self._meetingTimes = list(MeetingTime.objects.all())
-        self._instructors = list(Instructor.objects.all())
-        self._courses = list(Course.objects.all())
-        self._depts = list(Department.objects.all())
+        course_instructors = {
+            pk: tuple(instructor_index[i] for i in insts)
+            for pk, insts in course_instructors.items()
+        }
+
+        # Genes of one department and type share one rooms tuple, and all
+        # departments share the full one while no room has a department.
+        room_sets = {}
+
+        def rooms_for(dept, is_lab):
+            rooms = self.lab_rooms if is_lab else self.lecture_rooms
+            if (dept, is_lab) not in room_sets:
+                usable = [n for n in rooms if self._rooms[n].department_id in (None, dept)]
+                # own rooms first, so construction keeps shared ones free
+                usable.sort(key=lambda n: self._rooms[n].department_id is None)
+                room_sets[dept, is_lab] = rooms if usable == list(rooms) else tuple(usable)
+            return room_sets[dept, is_lab]
+
+        # Genes: every section's labs first, then its weekly classes (the
+        # order construction places them in).
+        self.gene_section, self.gene_course = [], []
+        self.gene_rooms, self.gene_instructors, self.gene_blocks = [], [], []
+        self.gene_is_lab = []
+
+        def add_gene(s, course, is_lab):
+            self.gene_section.append(s)
+            self.gene_course.append(course_index[course.pk])
+            self.gene_is_lab.append(is_lab)
+            self.gene_rooms.append(rooms_for(self._sections[s].department_id, is_lab))
+            self.gene_blocks.append(self.lab_blocks if is_lab else self.class_blocks)
+            self.gene_instructors.append(course_instructors.get(course.pk, ()))
+
+        section_courses = []
+        for section in self._sections:
+            dept = self._section_dept[section.pk]
+            courses = [self._courses[course_index[pk]] for pk in dept_courses.get(dept.pk, ())]
+            section_courses.append(courses)
+
+        for s, courses in enumerate(section_courses):
+            for course in courses:
+                if course.room_required == "Lab":
+                    add_gene(s, course, True)
+
+        for s, courses in enumerate(section_courses):
+            reg_courses = [c for c in courses if c.room_required != "Lab"]
+            if not reg_courses:
+                continue
+            for k in range(self._sections[s].num_class_in_week):
+                add_gene(s, reg_courses[k % len(reg_courses)], False)
+
+        for name in ("gene_section", "gene_course", "gene_rooms",
+                     "gene_instructors", "gene_blocks", "gene_is_lab"):
+            setattr(self, name, tuple(getattr(self, name)))
+
+        self.numb_genes = len(self.gene_section)
+        self.lab_genes = tuple(g for g in range(self.numb_genes) if self.gene_is_lab[g])
+        self.class_genes = tuple(g for g in range(self.numb_genes) if not self.gene_is_lab[g])
+        self.section_class_genes = tuple(
+            tuple(g for g in self.class_genes if self.gene_section[g] == s)
+            for s in range(self.numb_sections)
+        )
+
+    # ------ conflict graph, for DSATUR construction ------
+    # Two genes are adjacent when they share a section or a candidate
+    # instructor: only then can placing one take a slot from the other.
+    @cached_property
+    def section_genes(self):
+        """Every gene of each section, labs included."""
+        genes = [[] for _ in range(self.numb_sections)]
+        for g, s in enumerate(self.gene_section):
+            genes[s].append(g)
+        return tuple(map(tuple, genes))
+
+    @cached_property
+    def instructor_genes(self):
+        """The genes each instructor is a candidate for."""
+        genes = [[] for _ in range(self.numb_instructors)]
+        for g, insts in enumerate(self.gene_instructors):
+            for i in insts:
+                genes[i].append(g)
+        return tuple(map(tuple, genes))
+
+    @cached_property
+    def gene_degree(self):
+        """Each gene's number of neighbours in the conflict graph."""
+        return tuple(
+            len(set(self.section_genes[self.gene_section[g]]).union(
+                *(self.instructor_genes[i] for i in self.gene_instructors[g]))) - 1
+            for g in range(self.numb_genes)
+        )
+
+    # ------ decomposition into independent subproblems ------
+    def components(self):
+        """
+        The connected components of the section–instructor–room graph, as
+        tuples of section indices, largest first. Sections in different
+        components share no candidate instructor or room, so each
+        component can be solved on its own (see ``subproblem``). Sections
+        without genes are left out.
+        """
+        parent = list(range(self.numb_sections + self.numb_instructors + self.numb_rooms))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        def union(a, b):
+            a, b = find(a), find(b)
+            if a != b:
+                parent[b] = a
+
+        first_instructor = self.numb_sections
+        first_room = first_instructor + self.numb_instructors
+        seen = set()
+        for g, s in enumerate(self.gene_section):
+            # genes of one section and type share their candidate sets
+            if (s, self.gene_instructors[g], self.gene_rooms[g]) in seen:
+                continue
+            seen.add((s, self.gene_instructors[g], self.gene_rooms[g]))
+            for i in self.gene_instructors[g]:
+                union(s, first_instructor + i)
+            for r in self.gene_rooms[g]:
+                union(s, first_room + r)
+
+        groups = {}
+        for s in dict.fromkeys(self.gene_section):
+            groups.setdefault(find(s), []).append(s)
+        return sorted(map(tuple, groups.values()), key=len, reverse=True)
+
+    def subproblem(self, sections):
+        """
+        A snapshot of just ``sections`` (section indices, e.g. one of
+        ``components()``) with the rooms, instructors and courses their
+        departments use. Its meetings carry the same model pks, so a
+        solution can be merged back with ``Schedule.from_meetings``.
+        """
+        sections = [self._sections[s] for s in sections]
+        dept_pks = {s.department_id for s in sections}
+        depts = [d for d in self._depts if d.pk in dept_pks]
+        dept_courses = {d.pk: self._dept_courses.get(d.pk, ()) for d in depts}
+        course_pks = {pk for pks in dept_courses.values() for pk in pks}
+        instructor_pks = {i for pk in course_pks for i in self._course_instructors.get(pk, ())}
+        return ProblemSnapshot(
+            rooms=[r for r in self._rooms if r.department_id in dept_pks | {None}],
+            meeting_times=self._meetingTimes,
+            instructors=[i for i in self._instructors if i.pk in instructor_pks],
+            courses=[c for c in self._courses if c.pk in course_pks],
+            depts=depts,
+            sections=sections,
+            course_instructors={pk: self._course_instructors.get(pk, ()) for pk in course_pks},
+            dept_courses=dept_courses,
+        )
+
+    @classmethod
+    def load(cls):
+        courses = Course.objects.prefetch_related("instructors")
+        depts = Department.objects.prefetch_related("courses")
+        return cls(
+            rooms=Room.objects.all(),
+            meeting_times=MeetingTime.objects.all(),
+            instructors=Instructor.objects.all(),
+            courses=courses,
+            depts=depts,
+            sections=Section.objects.select_related("department"),
+            course_instructors={c.pk: [i.pk for i in c.instructors.all()] for c in courses},
+            dept_courses={d.pk: [c.pk for c in d.courses.all()] for d in depts},
+        )
 
     def get_rooms(self): return self._rooms
     def get_instructors(self): return self._instructors
     def get_courses(self): return self._courses
     def get_depts(self): return self._depts
     def get_meetingTimes(self): return self._meetingTimes
+    def get_sections(self): return self._sections
 
-    def get_lab_rooms(self):
-        return [r for r in self._rooms if r.room_type == "Lab"]
+    @staticmethod
+    def _weekly_order(mt):
+        day = DAY_ORDER.index(mt.day) if mt.day in DAY_ORDER else len(DAY_ORDER)
+        return day, mt.day, int(mt.time), mt.pk
 
-    def get_lecture_rooms(self):
-        return [r for r in self._rooms if r.room_type != "Lab"]
+    # ------ 4 consecutive slots for a lab (1–4 or 6–9) ------
+    def _build_lab_block(self, day, start_slot):
+        day_slots = [t for t, (d, _) in enumerate(self.slots) if d == day]
+
+        try:
+            idx = next(i for i, t in enumerate(day_slots) if self.slots[t][1] == start_slot)
+        except StopIteration:
+            return ()
+
+        end = idx + LAB_DURATION - 1
+        if end >= len(day_slots):
+            return ()
+
+        block = day_slots[idx:end+1]
+
+        # if any slot is lunch → invalid block
+        for t in block:
+            if self.slots[t][1] == LUNCH_SLOT:
+                return ()
+
+        return tuple(block)
+
+    # ------ decoding, for rendering only ------
+    def build_gene(self, g, time, room, instructor):
+        section = self._sections[self.gene_section[g]]
+        dept = self._section_dept[section.pk]
+        course = self._courses[self.gene_course[g]]
+        mts = [self._meetingTimes[t] for t in self.gene_blocks[g][time]]
+
+        if self.gene_is_lab[g]:
+            gene = Lab(g, dept, section.section_id, course)
+            gene.set_meetingTimes(mts)
+        else:
+            gene = Class(g, dept, section.section_id, course)
+            gene.set_meetingTime(mts[0])
+        gene.set_room(self._rooms[room])
+        gene.set_instructor(self._instructors[instructor])
+        return gene
+
+    @cached_property
+    def block_table(self):
+        """
+        (table, gene_offset) for vectorised fitness: row
+        ``gene_offset[g] + time`` of ``table`` lists the slots gene g
+        occupies, padded with -1; the last row (all -1) stands for UNPLACED.
+        """
+        offsets, rows = {}, []
+        for blocks in self.gene_blocks:
+            if id(blocks) not in offsets:
+                offsets[id(blocks)] = len(rows)
+                rows.extend(blocks)
+
+        table = np.full((len(rows) + 1, LAB_DURATION), -1, dtype=np.intp)
+        for n, block in enumerate(rows):
+            table[n, :len(block)] = block
+        gene_offset = np.array([offsets[id(b)] for b in self.gene_blocks], dtype=np.intp)
+        return table, gene_offset
+
+    def describe_gene(self, g):
+        kind = "lab" if self.gene_is_lab[g] else "class"
+        section = self._sections[self.gene_section[g]]
+        return f"{kind} {self._courses[self.gene_course[g]]} for {section.section_id}"
+
+    @cached_property
+    def problem_hash(self):
+        """
+        SHA-256 of everything a solution depends on: the keys of the
+        slots, rooms, instructors, courses and sections it refers to, and
+        each gene's section, course, blocks, rooms and instructors.
+        """
+        content = repr((
+            [mt.pk for mt in self._meetingTimes],
+            [r.pk for r in self._rooms],
+            [i.pk for i in self._instructors],
+            [c.pk for c in self._courses],
+            [s.pk for s in self._sections],
+            self.gene_section, self.gene_course, self.gene_is_lab,
+            self.gene_blocks, self.gene_rooms, self.gene_instructors,
+        ))
+        return hashlib.sha256(content.encode()).hexdigest()
 
 
 data = None
 
 
 # ---------------- CLASS & LAB OBJECTS ----------------
+# Model-level view of a placed gene, built by ProblemSnapshot.build_gene
+# when a timetable is rendered.
 
 class Class:
     def __init__(self, id, dept, section, course):
@@ -85,413 +494,1472 @@ class Lab:
 # ---------------- SCHEDULE ----------------
 
 class Schedule:
-    def __init__(self):
+    """
+    One candidate timetable, stored as three parallel int arrays indexed
+    by gene: the chosen block (an index into the gene's blocks), room and
+    instructor, with UNPLACED where the gene has no place.
+
+    ``params`` (from ga_parameters(); default the module settings) gives
+    the construction and sampling settings.
+    """
+
+    def __init__(self, params=None):
         self._data = data
-        self._labs = []
-        self._classes = []
-        self._fitness = -1
-        self._isFitnessChanged = True
+        self._params = ga_parameters() if params is None else params
+        n = data.numb_genes
+        self._time = array("i", [UNPLACED]) * n
+        self._room = array("i", [UNPLACED]) * n
+        self._instructor = array("i", [UNPLACED]) * n
+
+        # Genes per (slot, section), (slot, room) and (slot, instructor),
+        # flattened as slot * width + key; kept in step with the genes so
+        # the conflict count never needs a full recount.
+        self._section_occ = array("i", [0]) * (data.numb_slots * data.numb_sections)
+        self._room_occ = array("i", [0]) * (data.numb_slots * data.numb_rooms)
+        self._instructor_occ = array("i", [0]) * (data.numb_slots * data.numb_instructors)
         self._numberOfConflicts = 0
-        self._labNumb = 0
-        self._classNumb = 0
-
-    def get_labs(self): return self._labs
-    def get_classes(self): return self._classes
+        self._numberOfUnplaced = n
+
+        # gene -> why construction could not place it
+        self._unplaced = {}
+        self._strategy = self._params["CONSTRUCTION_STRATEGY"]
+
+    @classmethod
+    def from_chromosome(cls, time, room, instructor, params=None):
+        """A schedule holding copies of the given gene arrays."""
+        schedule = cls(params)
+        schedule._time = array("i", time)
+        schedule._room = array("i", room)
+        schedule._instructor = array("i", instructor)
+        schedule.calculate_fitness()
+        return schedule
+
+    @classmethod
+    def from_meetings(cls, meetings):
+        """
+        Rebuild a stored timetable on the current snapshot.
+
+        ``meetings`` are (section, course, room, instructor, meeting time,
+        is_lab) keys, as in ScheduledMeeting. Each is matched to a gene of
+        the same section and course; meetings with a deleted or no longer
+        allowed room, instructor or time leave their gene unplaced, as do
+        genes with no meeting (a section now meeting more often). Returns
+        the schedule and the genes left unplaced.
+        """
+        d = data
+        sections = {s.pk: n for n, s in enumerate(d.get_sections())}
+        courses = {c.pk: n for n, c in enumerate(d.get_courses())}
+        rooms = {r.pk: n for n, r in enumerate(d.get_rooms())}
+        instructors = {i.pk: n for n, i in enumerate(d.get_instructors())}
+        slots = {mt.pk: t for t, mt in enumerate(d.get_meetingTimes())}
+        starts = {False: {b[0]: n for n, b in enumerate(d.class_blocks)},
+                  True: {b[0]: n for n, b in enumerate(d.lab_blocks)}}
+
+        genes = {}
+        for g in range(d.numb_genes):
+            genes.setdefault((d.gene_section[g], d.gene_course[g], d.gene_is_lab[g]), []).append(g)
+        for key in genes:
+            genes[key].reverse()
+
+        schedule = cls()
+        for section, course, room, instructor, meeting_time, is_lab in meetings:
+            free = genes.get((sections.get(section), courses.get(course), is_lab))
+            if not free:
+                continue
+            g = free.pop()
+            time = starts[is_lab].get(slots.get(meeting_time))
+            room, instructor = rooms.get(room), instructors.get(instructor)
+            if (time is not None and room in d.gene_rooms[g] and
+                    instructor in d.gene_instructors[g]):
+                schedule.set_gene(g, time, room, instructor)
+
+        unplaced = [g for g in range(d.numb_genes) if schedule._time[g] == UNPLACED]
+        return schedule, unplaced
+
+    def get_chromosome(self):
+        return self._time, self._room, self._instructor
+
+    def get_meetings(self):
+        """The placed genes as from_meetings() keys."""
+        d = self._data
+        sections, courses = d.get_sections(), d.get_courses()
+        rooms, instructors, mts = d.get_rooms(), d.get_instructors(), d.get_meetingTimes()
+        return [(sections[d.gene_section[g]].pk, courses[d.gene_course[g]].pk,
+                 rooms[self._room[g]].pk, instructors[self._instructor[g]].pk,
+                 mts[d.gene_blocks[g][self._time[g]][0]].pk, d.gene_is_lab[g])
+                for g in range(d.numb_genes) if self._time[g] != UNPLACED]
+
+    def copy(self, params=None):
+        clone = Schedule.from_chromosome(*self.get_chromosome(),
+                                         params=self._params if params is None else params)
+        clone._unplaced = dict(self._unplaced)
+        return clone
+
+    def get_gene(self, g):
+        return self._time[g], self._room[g], self._instructor[g]
+
+    def get_numb_of_conflicts(self): return self._numberOfConflicts
+
+    def get_numb_of_unplaced(self): return self._numberOfUnplaced
 
     def get_fitness(self):
-        if self._isFitnessChanged:
-            self._fitness = self.calculate_fitness()
-            self._isFitnessChanged = False
-        return self._fitness
-
-    # ------ get 4 consecutive slots for lab (1–4 or 6–9) ------
-    def _get_consecutive_slots(self, day, start_slot):
-        all_times = self._data.get_meetingTimes()
-        order = ["1","2","3","4","5","6","7","8","9"]
-
-        day_slots = [mt for mt in all_times if mt.day == day]
-        day_slots.sort(key=lambda mt: order.index(mt.time))
-
-        try:
-            idx = next(i for i, mt in enumerate(day_slots) if mt.time == start_slot)
-        except StopIteration:
-            return []
-
-        end = idx + LAB_DURATION - 1
-        if end >= len(day_slots):
-            return []
-
-        block = day_slots[idx:end+1]
-
-        # if any slot is lunch → invalid block
-        for mt in block:
-            if mt.time == LUNCH_SLOT:
-                return []
+        penalty = self._params["UNPLACED_PENALTY"] * self._numberOfUnplaced
+        return 1 / (1 + self._numberOfConflicts + penalty)
+
+    def get_unplaced(self):
+        """(gene, reason) for every gene that currently has no place."""
+        return [(g, self._unplaced.get(g, "not placed"))
+                for g, time in enumerate(self._time) if time == UNPLACED]
+
+    # Model objects for rendering; the GA itself never builds these.
+    def get_labs(self):
+        return [self._data.build_gene(g, *self.get_gene(g))
+                for g in self._data.lab_genes if self._time[g] != UNPLACED]
+
+    def get_classes(self):
+        return [self._data.build_gene(g, *self.get_gene(g))
+                for g in self._data.class_genes if self._time[g] != UNPLACED]
+
+    # ------ live occupancy counters ------
+    def _update_occupancy(self, g, step):
+        # A bucket already holding n genes gains n new conflicting pairs
+        # when a gene joins it, and loses n-1 when one leaves.
+        time = self._time[g]
+        if time == UNPLACED:
+            return
+
+        d = self._data
+        s, r, i = d.gene_section[g], self._room[g], self._instructor[g]
+        S, R, I = d.numb_sections, d.numb_rooms, d.numb_instructors
+        sec_occ, room_occ, inst_occ = self._section_occ, self._room_occ, self._instructor_occ
+        conflicts = 0
 
-        return block
+        for t in d.gene_blocks[g][time]:
+            if step > 0:
+                conflicts += sec_occ[t * S + s] + room_occ[t * R + r] + inst_occ[t * I + i]
+            sec_occ[t * S + s] += step
+            room_occ[t * R + r] += step
+            inst_occ[t * I + i] += step
+            if step < 0:
+                conflicts -= sec_occ[t * S + s] + room_occ[t * R + r] + inst_occ[t * I + i]
+
+        self._numberOfConflicts += conflicts
+
+    def set_gene(self, g, time, room, instructor):
+        """
+        Move gene ``g`` (UNPLACED removes it) and return the change in
+        conflicts: O(1) for a class, O(LAB_DURATION) for a lab.
+        """
+        before = self._numberOfConflicts
+        self._update_occupancy(g, -1)
+        self._numberOfUnplaced += (time == UNPLACED) - (self._time[g] == UNPLACED)
+        self._time[g] = time
+        self._room[g] = room
+        self._instructor[g] = instructor
+        self._update_occupancy(g, +1)
+        return self._numberOfConflicts - before
 
     # ------ conflict checks --------
-    def _conflicts_if_assign_lab(self, mts, room, instructor, section):
-        # Against labs
-        for lab in self._labs:
-            for mt in mts:
-                if mt in lab.meeting_times:
-                    if lab.section == section: return True
-                    if lab.room == room: return True
-                    if lab.instructor == instructor: return True
-
-        # Against classes
-        for cls in self._classes:
-            for mt in mts:
-                if (cls.meeting_time and
-                    cls.meeting_time.day == mt.day and
-                    cls.meeting_time.time == mt.time):
-                    if cls.section == section: return True
-                    if cls.room == room: return True
-                    if cls.instructor == instructor: return True
-
+    # A few occupancy lookups per slot, however many genes are placed.
+    def _conflicts_if_assign(self, g, block, room, instructor):
+        d = self._data
+        s = d.gene_section[g]
+        S, R, I = d.numb_sections, d.numb_rooms, d.numb_instructors
+        for t in block:
+            if (self._section_occ[t * S + s] or
+                    self._room_occ[t * R + room] or
+                    self._instructor_occ[t * I + instructor]):
+                return True
         return False
 
-    def _conflicts_if_assign_class(self, mt, room, instructor, section):
-        # VS labs
-        for lab in self._labs:
-            if mt in lab.meeting_times:
-                if lab.section == section: return True
-                if lab.room == room: return True
-                if lab.instructor == instructor: return True
-
-        # VS other classes
-        for cls in self._classes:
-            if (cls.meeting_time and
-                cls.meeting_time.day == mt.day and
-                cls.meeting_time.time == mt.time):
-                if cls.section == section: return True
-                if cls.room == room: return True
-                if cls.instructor == instructor: return True
-
-        return False
+    @staticmethod
+    def _free(occ, width, block, keys):
+        """The keys not occupied in any slot of ``block``."""
+        if len(block) == 1:
+            base = block[0] * width
+            return [k for k in keys if not occ[base + k]]
+        return [k for k in keys if not any(occ[t * width + k] for t in block)]
+
+    # ------ candidate samplers ------
+    # Both return ((time, room, instructor), None) on success and
+    # (None, reason) when gene g cannot be placed.
+    def _sample_by_retry(self, g):
+        d = self._data
+        blocks, rooms, insts = d.gene_blocks[g], d.gene_rooms[g], d.gene_instructors[g]
+        if not insts:
+            return None, "course has no instructors"
+        if not blocks or not rooms:
+            return None, self._empty_domain_reason(blocks, rooms, ())
+
+        attempts = self._params["MAX_RANDOM_ATTEMPTS"]
+        for _ in range(attempts):
+            time = rnd.randrange(len(blocks))
+            room = rnd.choice(rooms)
+            instructor = rnd.choice(insts)
+            if not self._conflicts_if_assign(g, blocks[time], room, instructor):
+                return (time, room, instructor), None
+
+        return None, f"no conflict-free placement in {attempts} random attempts"
+
+    def _sample_free(self, g, exclude_time=None):
+        """
+        Sample uniformly among all conflict-free (time, room, instructor)
+        triples, leaving out block ``exclude_time`` if given.
+        """
+        d = self._data
+        blocks, rooms, insts = d.gene_blocks[g], d.gene_rooms[g], d.gene_instructors[g]
+
+        # A few draws from the whole product first: an accepted draw is
+        # already uniform over the free triples, and on sparse schedules
+        # this avoids working out the domain at all.
+        if not insts:
+            return None, "course has no instructors"
+
+        draws = self._params["FREE_SAMPLE_DRAWS"]
+        if blocks and rooms:
+            for _ in range(draws):
+                time = rnd.randrange(len(blocks))
+                room = rnd.choice(rooms)
+                instructor = rnd.choice(insts)
+                if time != exclude_time and \
+                        not self._conflicts_if_assign(g, blocks[time], room, instructor):
+                    return (time, room, instructor), None
+
+        # Then the same over the blocks the section itself has free, which
+        # is still uniform over the free triples.
+        s = d.gene_section[g]
+        S = d.numb_sections
+        open_blocks = [time for time, block in enumerate(blocks)
+                       if time != exclude_time and
+                       not any(self._section_occ[t * S + s] for t in block)]
+        if open_blocks and rooms:
+            for _ in range(draws):
+                time = rnd.choice(open_blocks)
+                room = rnd.choice(rooms)
+                instructor = rnd.choice(insts)
+                if not self._conflicts_if_assign(g, blocks[time], room, instructor):
+                    return (time, room, instructor), None
+
+        # Otherwise work out the whole free domain.
+        options, weights = [], []
+        open_for = {"section"} if open_blocks else set()
+
+        for time in open_blocks:
+            block = blocks[time]
+            free_insts = self._free(self._instructor_occ, d.numb_instructors, block, insts)
+            if free_insts:
+                open_for.add("instructor")
+            elif "room" in open_for:
+                continue
 
-    # ------ initialize labs first ------
-    def initialize_labs(self):
-        sections = Section.objects.all()
-        lab_rooms = self._data.get_lab_rooms()
-        all_mt = self._data.get_meetingTimes()
-        days = sorted(list(set(mt.day for mt in all_mt)))
+            free_rooms = self._free(self._room_occ, d.numb_rooms, block, rooms)
+            if free_rooms:
+                open_for.add("room")
+
+            if free_rooms and free_insts:
+                options.append((time, free_rooms, free_insts))
+                weights.append(len(free_rooms) * len(free_insts))
+
+        if not options:
+            return None, self._empty_domain_reason(blocks, rooms, open_for)
+
+        time, free_rooms, free_insts = rnd.choices(options, weights)[0]
+        return (time, rnd.choice(free_rooms), rnd.choice(free_insts)), None
+
+    @staticmethod
+    def _empty_domain_reason(blocks, rooms, open_for):
+        if not blocks: return "no usable meeting times"
+        if not rooms: return "no room of the required type"
+        if "section" not in open_for: return "section has no free slot"
+        if "room" not in open_for: return "no room free in any open slot"
+        if "instructor" not in open_for: return "no instructor free in any open slot"
+        return "no slot with both a free room and a free instructor"
+
+    # ------ construction: labs first, then classes (gene order) ------
+    def initialize(self, strategy=None):
+        self._strategy = strategy or self._params["CONSTRUCTION_STRATEGY"]
+        if self._strategy == "dsatur":
+            return self._construct_dsatur()
+        sample = self._sample_free if self._strategy == "feasible" else self._sample_by_retry
+
+        for g in range(self._data.numb_genes):
+            candidate, reason = sample(g)
+            if candidate is None:
+                self._unplaced[g] = reason
+            else:
+                self.set_gene(g, *candidate)
 
-        for section in sections:
-            dept = section.department
-            lab_courses = [c for c in dept.courses.all() if c.room_required == "Lab"]
+        return self
 
-            for course in lab_courses:
-                insts = list(course.instructors.all())
-                if not insts:
+    def _construct_dsatur(self):
+        """
+        DSATUR over the conflict graph, with slots as colours: labs, then
+        classes, are placed in order of saturation (distinct slots already
+        taken by placed neighbours), then degree, with random tie-breaks.
+        Each gene gets a random conflict-free (block, room, instructor) as
+        in "feasible"; genes with none are left unplaced.
+
+        Placing a gene only takes its slots from its section's genes and
+        from the genes of the instructor it was given, so only those have
+        their saturation bumped.
+        """
+        d = self._data
+        degree = d.gene_degree
+        seen = [bytearray(d.numb_slots) for _ in range(d.numb_genes)]
+        saturation = [0] * d.numb_genes
+        pending = [True] * d.numb_genes
+
+        for phase in (d.lab_genes, d.class_genes):
+            in_phase = set(phase)
+            heap = [(-saturation[g], -degree[g], rnd.random(), g) for g in phase]
+            heapq.heapify(heap)
+            while heap:
+                sat, _, _, g = heapq.heappop(heap)
+                if not pending[g] or -sat != saturation[g]:
+                    continue  # placed already, or a stale entry
+                pending[g] = False
+
+                candidate, reason = self._sample_free(g)
+                if candidate is None:
+                    self._unplaced[g] = reason
                     continue
+                self.set_gene(g, *candidate)
 
-                newLab = Lab(self._labNumb, dept, section.section_id, course)
-                self._labNumb += 1
-
-                assigned = False
-                attempts = 0
-
-                while not assigned and attempts < 50:
-                    attempts += 1
-                    day = rnd.choice(days)
-                    start_slot = rnd.choice(VALID_LAB_START_SLOTS)  # "1" or "6"
-
-                    block = self._get_consecutive_slots(day, start_slot)
-                    if not block:
+                time, _, instructor = candidate
+                block = d.gene_blocks[g][time]
+                for h in d.section_genes[d.gene_section[g]] + d.instructor_genes[instructor]:
+                    if not pending[h]:
                         continue
-
-                    room = rnd.choice(lab_rooms)
-                    instructor = rnd.choice(insts)
-
-                    if not self._conflicts_if_assign_lab(block, room, instructor, section.section_id):
-                        newLab.set_meetingTimes(block)
-                        newLab.set_room(room)
-                        newLab.set_instructor(instructor)
-                        assigned = True
-
-                if assigned:
-                    self._labs.append(newLab)
+                    seen_h, before = seen[h], saturation[h]
+                    for t in block:
+                        if not seen_h[t]:
+                            seen_h[t] = 1
+                            saturation[h] += 1
+                    if h in in_phase and saturation[h] != before:
+                        heapq.heappush(heap, (-saturation[h], -degree[h], rnd.random(), h))
 
         return self
 
-    # ------ initialize regular classes (no lunch) ------
-    def initialize_classes(self):
-        sections = Section.objects.all()
-        # Do NOT use slot 5 (lunch) for classes
-        all_mt = [mt for mt in self._data.get_meetingTimes() if mt.time != LUNCH_SLOT]
-        class_rooms = self._data.get_lecture_rooms()
+    # ------ repair ------
+    def is_conflicted(self, g):
+        """Whether gene g shares a slot with another gene's section, room or instructor."""
+        time = self._time[g]
+        if time == UNPLACED:
+            return False
+
+        d = self._data
+        s, r, i = d.gene_section[g], self._room[g], self._instructor[g]
+        S, R, I = d.numb_sections, d.numb_rooms, d.numb_instructors
+        return any(self._section_occ[t * S + s] > 1 or
+                   self._room_occ[t * R + r] > 1 or
+                   self._instructor_occ[t * I + i] > 1
+                   for t in d.gene_blocks[g][time])
+
+    def _free_at_same_time(self, g, time, room, instructor):
+        """Keep gene g's time but swap to a free room and/or instructor, if any."""
+        d = self._data
+        block = d.gene_blocks[g][time]
+        s, S = d.gene_section[g], d.numb_sections
+        if any(self._section_occ[t * S + s] for t in block):
+            return None
+
+        free_rooms = self._free(self._room_occ, d.numb_rooms, block, d.gene_rooms[g])
+        free_insts = self._free(self._instructor_occ, d.numb_instructors, block, d.gene_instructors[g])
+        if not free_rooms or not free_insts:
+            return None
+
+        return (time,
+                room if room in free_rooms else rnd.choice(free_rooms),
+                instructor if instructor in free_insts else rnd.choice(free_insts))
+
+    def get_conflicted(self):
+        return [g for g in range(self._data.numb_genes) if self.is_conflicted(g)]
+
+    def block_costs(self, g):
+        """
+        The conflicts gene g (taken out first) would have in each of its
+        blocks with that block's least-conflicting room and instructor.
+        """
+        d = self._data
+        s, rooms, insts = d.gene_section[g], d.gene_rooms[g], d.gene_instructors[g]
+        S, R, I = d.numb_sections, d.numb_rooms, d.numb_instructors
+        sec_occ, room_occ, inst_occ = self._section_occ, self._room_occ, self._instructor_occ
+        return [sum(sec_occ[t * S + s] for t in block) +
+                min(sum(room_occ[t * R + r] for t in block) for r in rooms) +
+                min(sum(inst_occ[t * I + i] for t in block) for i in insts)
+                for block in d.gene_blocks[g]]
+
+    def cheapest_at(self, g, time):
+        """A least-conflicting (room, instructor) for gene g in block ``time``, ties broken at random."""
+        d = self._data
+        block = d.gene_blocks[g][time]
+        R, I = d.numb_rooms, d.numb_instructors
+
+        def cheapest(keys, occ, width):
+            costs = [sum(occ[t * width + k] for t in block) for k in keys]
+            low = min(costs)
+            return rnd.choice([k for k, c in zip(keys, costs) if c == low])
+
+        return (cheapest(d.gene_rooms[g], self._room_occ, R),
+                cheapest(d.gene_instructors[g], self._instructor_occ, I))
+
+    def relocate(self, g):
+        """
+        Move gene g to a free (time, room, instructor), first trying just
+        another room / instructor at its current time; an unplaced gene is
+        placed if it can be. With nowhere free to go, a placed gene moves
+        to its least-conflicting spot if that has fewer conflicts than
+        where it is, and an unplaced one stays unplaced.
+        Returns whether the gene changed.
+        """
+        current = self.get_gene(g)
+        unplaced = current[0] == UNPLACED
+
+        old = -self.set_gene(g, UNPLACED, UNPLACED, UNPLACED)
+        candidate = None if unplaced else self._free_at_same_time(g, *current)
+        if candidate is None:
+            candidate, reason = self._sample_free(g)
+
+        if candidate is None:
+            if unplaced:
+                self._unplaced[g] = reason
+                return False
+            costs = self.block_costs(g)
+            low = min(costs, default=old)
+            if low >= old:
+                self.set_gene(g, *current)
+                return False
+            time = rnd.choice([b for b, cost in enumerate(costs) if cost == low])
+            candidate = (time, *self.cheapest_at(g, time))
+
+        self.set_gene(g, *candidate)
+        return candidate != current
+
+    def repair(self):
+        """
+        Relocate every conflicting gene and try to place unplaced ones.
+        Returns the number of genes moved or placed.
+        """
+        fixed = 0
+        for g in range(self._data.numb_genes):
+            if self._time[g] == UNPLACED or self.is_conflicted(g):
+                fixed += self.relocate(g)
+        return fixed
+
+    # ------ mutation moves ------
+    # Each returns the change in conflicts. They start from a gene in
+    # ``conflicted`` (as from get_conflicted()) when there is one.
+    def _pick(self, labs, conflicted):
+        d = self._data
+        preferred = [g for g in conflicted if d.gene_is_lab[g] == labs]
+        if preferred:
+            return rnd.choice(preferred)
+        placed = [g for g in (d.lab_genes if labs else d.class_genes)
+                  if self._time[g] != UNPLACED]
+        return rnd.choice(placed) if placed else None
+
+    def swap_classes(self, conflicted=()):
+        """Swap the times of two classes of the same section."""
+        d = self._data
+        g1 = self._pick(False, conflicted)
+        if g1 is None:
+            return 0
+
+        partners = [g for g in d.section_class_genes[d.gene_section[g1]]
+                    if g != g1 and self._time[g] not in (UNPLACED, self._time[g1])]
+        if not partners:
+            return 0
+        g2 = rnd.choice(partners)
+
+        (t1, r1, i1), (t2, r2, i2) = self.get_gene(g1), self.get_gene(g2)
+        return self.set_gene(g1, t2, r1, i1) + self.set_gene(g2, t1, r2, i2)
+
+    def shift_lab(self, conflicted=()):
+        """Move a lab, with its room and instructor, to another block its section has free."""
+        d = self._data
+        g = self._pick(True, conflicted)
+        if g is None:
+            return 0
+
+        time, room, instructor = self.get_gene(g)
+        blocks, s, S = d.gene_blocks[g], d.gene_section[g], d.numb_sections
+        before = self._numberOfConflicts
+        self.set_gene(g, UNPLACED, UNPLACED, UNPLACED)
+        open_blocks = [b for b in range(len(blocks))
+                       if b != time and not any(self._section_occ[t * S + s] for t in blocks[b])]
+        self.set_gene(g, rnd.choice(open_blocks) if open_blocks else time, room, instructor)
+        return self._numberOfConflicts - before
+
+    # ------ fitness: count conflicts and unplaced genes ------
+    def calculate_fitness(self):
+        # Full recount from the genes. Every (slot, section), (slot, room)
+        # and (slot, instructor) bucket holding n genes contributes
+        # n*(n-1)/2 conflicts — the same pairs the class↔class, lab↔lab
+        # and lab↔class comparisons used to count, but in a single pass.
+        for occ in (self._section_occ, self._room_occ, self._instructor_occ):
+            occ[:] = array("i", [0]) * len(occ)
+        self._numberOfConflicts = 0
+        self._numberOfUnplaced = self._time.count(UNPLACED)
 
-        for section in sections:
-            dept = section.department
-            reg_courses = [c for c in dept.courses.all() if c.room_required != "Lab"]
-            if not reg_courses:
-                continue
+        for g in range(self._data.numb_genes):
+            self._update_occupancy(g, +1)
 
-            total = section.num_class_in_week
-            idx = 0
+        return self.get_fitness()
 
-            for _ in range(total):
-                course = reg_courses[idx % len(reg_courses)]
-                idx += 1
-                insts = list(course.instructors.all())
-                if not insts:
-                    continue
 
-                newClass = Class(self._classNumb, dept, section.section_id, course)
-                self._classNumb += 1
+# ---------------- GA ----------------
 
-                assigned = False
-                attempts = 0
-                while not assigned and attempts < 50:
-                    attempts += 1
-                    mt = rnd.choice(all_mt)
-                    room = rnd.choice(class_rooms)
-                    instructor = rnd.choice(insts)
+class Population:
+    def __init__(self, size, pool=None, warm_start=None, strategy=None, params=None):
+        # With a ``warm_start`` schedule, WARM_START_FRACTION of the
+        # members are it and perturbed copies of it; the rest are built
+        # from scratch with ``strategy`` (default CONSTRUCTION_STRATEGY).
+        # ``params`` overrides settings for this population only, as in
+        # ga_parameters().
+        self._params = ga_parameters(params)
+        strategy = strategy or self._params["CONSTRUCTION_STRATEGY"]
+        self._schedules = []
+        fraction = self._params["WARM_START_FRACTION"]
+        if warm_start is not None and size and fraction > 0:
+            warm = max(1, round(size * fraction))
+            self._schedules.append(warm_start.copy(self._params))
+            self._schedules.extend(self._perturbed(warm_start) for _ in range(warm - 1))
+            size -= warm
+
+        if pool is None:
+            self._schedules.extend(Schedule(self._params).initialize(strategy) for _ in range(size))
+        else:
+            built = pool.map(_build_chromosome, [(strategy, self._params)] * size)
+            self._schedules.extend(_from_worker(chromosome, unplaced, self._params)
+                                   for chromosome, unplaced in built)
+        self._fitness = None
+
+    def _perturbed(self, schedule):
+        """A copy of ``schedule`` with WARM_START_PERTURBATION of its genes in another free block."""
+        clone = schedule.copy(self._params)
+        genes = clone._data.numb_genes
+        for g in rnd.sample(range(genes), round(genes * self._params["WARM_START_PERTURBATION"])):
+            current = clone.get_gene(g)
+            if current[0] == UNPLACED:
+                continue
+            clone.set_gene(g, UNPLACED, UNPLACED, UNPLACED)
+            candidate, _ = clone._sample_free(g, exclude_time=current[0])
+            clone.set_gene(g, *(candidate or current))
+        return clone
 
-                    if not self._conflicts_if_assign_class(mt, room, instructor, section.section_id):
-                        newClass.set_meetingTime(mt)
-                        newClass.set_room(room)
-                        newClass.set_instructor(instructor)
-                        assigned = True
+    def get_schedules(self):
+        return self._schedules
 
-                if assigned:
-                    self._classes.append(newClass)
+    def add_schedule(self, schedule):
+        self._schedules.append(schedule)
+        self._fitness = None
 
-        return self
+    def set_schedule(self, i, schedule):
+        self._schedules[i] = schedule
+        self._fitness = None
 
-    def initialize(self):
-        self.initialize_labs()
-        self.initialize_classes()
-        return self
+    def get_fitness_values(self):
+        """Fitness per schedule, in schedule order, from evaluate_all()."""
+        if self._fitness is None:
+            self.evaluate_all()
+        return self._fitness
 
-    # ------ fitness: count conflicts ------
-    def calculate_fitness(self):
-        conflicts = 0
+    def evaluate_all(self):
+        """
+        Score every schedule from its chromosome in one vectorised pass.
+
+        Each (member, slot, key) occupancy is counted with one np.bincount
+        per constraint kind, and a bucket of n genes adds n*(n-1)/2
+        conflicts, exactly like Schedule.calculate_fitness; unplaced genes
+        add UNPLACED_PENALTY each.
+        """
+        if np is None or not self._schedules:
+            self._fitness = [s.get_fitness() for s in self._schedules]
+            return self._fitness
+
+        d = data
+        P, T = len(self._schedules), d.numb_slots
+        table, gene_offset = d.block_table
+
+        def stack(name):
+            raw = b"".join(getattr(s, name).tobytes() for s in self._schedules)
+            return np.frombuffer(raw, dtype=np.intc).reshape(P, d.numb_genes)
+
+        time, room, instructor = stack("_time"), stack("_room"), stack("_instructor")
+        rows = np.where(time == UNPLACED, len(table) - 1, gene_offset + time)
+        slots = table[rows]                                   # P x G x L
+        placed = slots >= 0
+        member = np.broadcast_to(np.arange(P)[:, None, None], slots.shape)[placed]
+        slot = slots[placed]
+
+        conflicts = np.zeros(P, dtype=np.int64)
+        section = np.broadcast_to(np.array(d.gene_section, dtype=np.intp)[None, :], time.shape)
+        for keys, width in ((section, d.numb_sections),
+                            (room, d.numb_rooms),
+                            (instructor, d.numb_instructors)):
+            key = np.broadcast_to(keys[:, :, None], slots.shape)[placed]
+            counts = np.bincount((member * T + slot) * width + key, minlength=P * T * width)
+            conflicts += (counts * (counts - 1) // 2).reshape(P, -1).sum(axis=1)
+
+        unplaced = (time == UNPLACED).sum(axis=1)
+        self._fitness = 1 / (1 + conflicts + self._params["UNPLACED_PENALTY"] * unplaced)
+        return self._fitness
 
-        # class ↔ class
-        for i, c1 in enumerate(self._classes):
-            for c2 in self._classes[i+1:]:
-                if c1.meeting_time and c2.meeting_time:
-                    same = (c1.meeting_time.day == c2.meeting_time.day and
-                            c1.meeting_time.time == c2.meeting_time.time)
-                    if same:
-                        if c1.section == c2.section: conflicts += 1
-                        if c1.room == c2.room: conflicts += 1
-                        if c1.instructor == c2.instructor: conflicts += 1
-
-        # lab ↔ lab
-        for i, l1 in enumerate(self._labs):
-            for l2 in self._labs[i+1:]:
-                for mt in l1.meeting_times:
-                    if mt in l2.meeting_times:
-                        if l1.section == l2.section: conflicts += 1
-                        if l1.room == l2.room: conflicts += 1
-                        if l1.instructor == l2.instructor: conflicts += 1
-
-        # lab ↔ class
-        for lab in self._labs:
-            for cls in self._classes:
-                if cls.meeting_time in lab.meeting_times:
-                    if cls.section == lab.section: conflicts += 1
-                    if cls.room == lab.room: conflicts += 1
-                    if cls.instructor == lab.instructor: conflicts += 1
-
-        self._numberOfConflicts = conflicts
-        return 1 / (1 + conflicts)
+    def sort(self):
+        """Order schedules best first, keeping ties in their current order."""
+        fitness = self.get_fitness_values()
+        order = sorted(range(len(self._schedules)), key=lambda n: fitness[n], reverse=True)
+        self._schedules = [self._schedules[n] for n in order]
+        self._fitness = [fitness[n] for n in order]
+        return self
 
 
-# ---------------- GA ----------------
+class GeneticAlgorithm:
+    def __init__(self, pool=None, deadline=None, params=None):
+        # With a pool from worker_pool(), children are bred in the workers.
+        self._pool = pool
+        # A generation bred here is abandoned once ``deadline`` passes
+        # (``pop`` comes back unchanged), and local search stops there.
+        self._deadline = deadline
+        # Settings for this run, as in ga_parameters().
+        self._params = ga_parameters(params)
 
-class Population:
-    def __init__(self, size):
-        self._schedules = [Schedule().initialize() for _ in range(size)]
+    def evolve(self, pop):
+        if self._pool is not None:
+            pop = self._breed_population(pop)
+        else:
+            children = self._crossover_population(pop)
+            if children is None:
+                return pop
+            pop = self._mutate_population(children)
+        p = self._params
+        if p["LOCAL_SEARCH"] and p["LOCAL_SEARCH_STAGE"] == "elite":
+            pop.set_schedule(0, LocalSearch(params=p).run(pop.get_schedules()[0].copy(), self._deadline))
+        return pop
 
-    def get_schedules(self):
-        return self._schedules
+    def _breed_population(self, pop):
+        # Parents are picked here; crossover, repair and mutation run in the
+        # workers, and only chromosomes travel each way.
+        bp = Population(0, params=self._params)
+        bp.add_schedule(pop.get_schedules()[0])  # elite
 
-
-class GeneticAlgorithm:
-    def evolve(self, pop):
-        return self._mutate_population(self._crossover_population(pop))
+        tasks = [(self._tournament(pop).get_chromosome(), self._tournament(pop).get_chromosome(),
+                  self._params)
+                 for _ in range(self._params["POPULATION_SIZE"] - 1)]
+        for chromosome, unplaced in self._pool.map(_breed, tasks):
+            bp.add_schedule(_from_worker(chromosome, unplaced, self._params))
+        return bp
 
     def _crossover_population(self, pop):
-        cp = Population(0)
-        cp.get_schedules().append(pop.get_schedules()[0])  # elite
+        cp = Population(0, params=self._params)
+        cp.add_schedule(pop.get_schedules()[0])  # elite
 
-        while len(cp.get_schedules()) < POPULATION_SIZE:
+        while len(cp.get_schedules()) < self._params["POPULATION_SIZE"]:
+            if self._deadline is not None and monotonic() >= self._deadline:
+                return None
             s1 = self._tournament(pop)
             s2 = self._tournament(pop)
-            cp.get_schedules().append(self._crossover(s1, s2))
+            cp.add_schedule(self._crossover(s1, s2))
 
         return cp
 
     def _mutate_population(self, pop):
-        for i in range(1, POPULATION_SIZE):
-            if rnd.random() < MUTATION_RATE:
-                pop.get_schedules()[i] = Schedule().initialize()
+        # The elite (index 0) is never mutated; the rest are fresh children
+        # and are changed in place.
+        for i in range(1, self._params["POPULATION_SIZE"]):
+            pop.set_schedule(i, self._mutate(pop.get_schedules()[i]))
         return pop
 
-    def _crossover(self, s1, s2):
-        child = Schedule().initialize()
-
-        labs_min = min(len(child.get_labs()), len(s1.get_labs()), len(s2.get_labs()))
-        for i in range(labs_min):
-            child.get_labs()[i] = s1.get_labs()[i] if rnd.random() > 0.5 else s2.get_labs()[i]
-
-        cls_min = min(len(child.get_classes()), len(s1.get_classes()), len(s2.get_classes()))
-        for i in range(cls_min):
-            child.get_classes()[i] = s1.get_classes()[i] if rnd.random() > 0.5 else s2.get_classes()[i]
+    def _mutate(self, schedule):
+        rates = self._params["MUTATION_RATES"]
+        if rnd.random() < rates["rebuild"]:
+            return Schedule(self._params).initialize()
+
+        conflicted = schedule.get_conflicted()
+        if rnd.random() < rates["swap_classes"]:
+            schedule.swap_classes(conflicted)
+        if rnd.random() < rates["shift_lab"]:
+            schedule.shift_lab(conflicted)
+        for g in conflicted:
+            if rnd.random() < rates["conflict_move"] and schedule.is_conflicted(g):
+                schedule.relocate(g)
+        return schedule
 
+    def _crossover(self, s1, s2):
+        return self._cross(s1.get_chromosome(), s2.get_chromosome())
+
+    def _cross(self, c1, c2):
+        # The child is built straight from copies of the parents' arrays,
+        # choosing a parent per gene ("uniform") or per section ("section",
+        # which keeps each section's week intact), then repaired.
+        d = data
+        if self._params["CROSSOVER_METHOD"] == "section":
+            pick = [rnd.random() > 0.5 for _ in range(d.numb_sections)]
+            from_s1 = [pick[s] for s in d.gene_section]
+        else:
+            from_s1 = [rnd.random() > 0.5 for _ in range(d.numb_genes)]
+
+        child = Schedule.from_chromosome(*(
+            [a if first else b for first, a, b in zip(from_s1, genes1, genes2)]
+            for genes1, genes2 in zip(c1, c2)
+        ), params=self._params)
+        if self._params["REPAIR_CHILDREN"]:
+            child.repair()
         return child
 
     def _tournament(self, pop):
-        tpop = Population(0)
-        for _ in range(TOURNAMENT_SELECTION_SIZE):
-            tpop.get_schedules().append(pop.get_schedules()[rnd.randrange(POPULATION_SIZE)])
-        tpop.get_schedules().sort(key=lambda s: s.get_fitness(), reverse=True)
-        return tpop.get_schedules()[0]
+        fitness = pop.get_fitness_values()
+        picks = [rnd.randrange(self._params["POPULATION_SIZE"])
+                 for _ in range(self._params["TOURNAMENT_SELECTION_SIZE"])]
+        return pop.get_schedules()[max(picks, key=lambda n: fitness[n])]
+
+
+class LocalSearch:
+    """
+    Simulated annealing or tabu search over single-gene moves (see
+    LOCAL_SEARCH), using the schedule's live conflict count, so each move
+    costs a scan of one gene's blocks rather than a recount.
+    """
+
+    def __init__(self, method=None, budget=None, params=None):
+        self._params = ga_parameters(params)
+        self._method = method or self._params["LOCAL_SEARCH"]
+        self._budget = self._params["LOCAL_SEARCH_BUDGET"] if budget is None else budget
+
+    def run(self, schedule, deadline=None):
+        """
+        Improve ``schedule`` in place for up to the time budget, or until
+        ``deadline`` if that is sooner, and return the best schedule seen:
+        ``schedule`` itself, or a new one when the search ended somewhere
+        worse.
+        """
+        stop = monotonic() + self._budget
+        if deadline is not None:
+            stop = min(stop, deadline)
+        d = schedule._data
+        best, best_chromosome = schedule.get_numb_of_conflicts(), None
+        temperature = self._params["ANNEAL_TEMPERATURE"]
+        tabu = {}
+        conflicted = []
+        step = 0
+
+        while schedule.get_numb_of_conflicts() and monotonic() < stop:
+            if not conflicted:
+                conflicted = schedule.get_conflicted()
+            g = conflicted.pop(rnd.randrange(len(conflicted)))
+            if not schedule.is_conflicted(g) or len(d.gene_blocks[g]) < 2:
+                continue
+            step += 1
+
+            time, room, instructor = schedule.get_gene(g)
+            old = -schedule.set_gene(g, UNPLACED, UNPLACED, UNPLACED)
+            costs = schedule.block_costs(g)
+            others = [b for b in range(len(costs)) if b != time]
+
+            if self._method == "tabu":
+                now = schedule.get_numb_of_conflicts()
+                allowed = [b for b in others if tabu.get((g, b), 0) < step or now + costs[b] < best]
+                if allowed:
+                    low = min(costs[b] for b in allowed)
+                    new = rnd.choice([b for b in allowed if costs[b] == low])
+                    tabu[(g, time)] = step + self._params["TABU_TENURE"]
+                else:
+                    new = time
+            else:
+                new = rnd.choice(others)
+                delta = costs[new] - old
+                if delta > 0 and rnd.random() >= math.exp(-delta / max(temperature, 1e-9)):
+                    new = time
+                temperature *= self._params["ANNEAL_COOLING"]
+
+            if new == time:
+                schedule.set_gene(g, time, room, instructor)
+            else:
+                schedule.set_gene(g, new, *schedule.cheapest_at(g, new))
+
+            if schedule.get_numb_of_conflicts() < best:
+                best = schedule.get_numb_of_conflicts()
+                best_chromosome = None
+            elif best_chromosome is None and schedule.get_numb_of_conflicts() > best:
+                # Leaving the best so far: keep a copy to return to.
+                best_chromosome = [array("i", genes) for genes in schedule.get_chromosome()]
+                if new != time:
+                    best_chromosome[0][g], best_chromosome[1][g], best_chromosome[2][g] = \
+                        time, room, instructor
+
+        if best_chromosome is None:
+            return schedule
+        restored = Schedule.from_chromosome(*best_chromosome, params=schedule._params)
+        restored._unplaced = schedule._unplaced
+        return restored
+
+
+class IslandModel:
+    """
+    Several populations evolved separately, swapping their best schedules
+    every ``interval`` generations.
+
+    Each island evolves on a worker of ``pool`` (serially when it is None)
+    for one interval at a time; between intervals the islands are held
+    here as chromosomes, and migrants replace the worst schedules of the
+    next island in the ring.
+    """
+
+    def __init__(self, pool=None, islands=None, interval=None, migrants=None, params=None):
+        self._pool = pool
+        self._params = p = ga_parameters(params)
+        self._islands = islands or p["ISLANDS"]
+        self._interval = interval or p["MIGRATION_INTERVAL"]
+        self._migrants = p["MIGRANTS"] if migrants is None else migrants
+
+    def run(self, max_gen, threshold, populations=None, report=None, deadline=None):
+        """
+        Evolve until any island reaches ``threshold``, ``max_gen``
+        generations have run or ``deadline`` passes (islands check it
+        between generations); return (best schedule, generations).
+        ``report(gen, best)`` is called after every migration interval.
+        """
+        if populations is None:
+            islands = [None] * self._islands
+        else:
+            islands = [[(s.get_chromosome(), s._unplaced, f)
+                        for s, f in zip(p.sort().get_schedules(), p.get_fitness_values())]
+                       for p in populations]
+
+        gen = 0
+        while True:
+            steps = min(self._interval, max_gen - gen)
+            tasks = [(members, steps, threshold, deadline, self._params) for members in islands]
+            results = list(self._pool.map(_evolve_island, tasks) if self._pool
+                           else map(_evolve_island, tasks))
+            islands = [members for members, _ in results]
+            gen += max(ran for _, ran in results)
+
+            best = max(islands, key=lambda members: members[0][2])[0]
+            logger.info("Generation %03d | Best fitness = %.4f across %d islands",
+                        gen, best[2], len(islands))
+            if report is not None:
+                report(gen, _from_worker(*best[:2], self._params))
+            if best[2] >= threshold or gen >= max_gen:
+                return _from_worker(*best[:2], self._params), gen
+            if deadline is not None and monotonic() >= deadline:
+                return _from_worker(*best[:2], self._params), gen
+
+            self._migrate(islands)
+
+    def _migrate(self, islands):
+        # Members are sorted best first, so the first ones leave and the
+        # last ones make room.
+        k = self._migrants
+        if k == 0 or len(islands) < 2:
+            return
+        emigrants = [members[:k] for members in islands]
+        for n, members in enumerate(islands):
+            members[-k:] = emigrants[n - 1]
+            members.sort(key=lambda member: member[2], reverse=True)
+
+
+def _evolve_island(task):
+    members, generations, threshold, deadline, params = task
+    params = ga_parameters(params)
+    if members is None:
+        population = Population(params["POPULATION_SIZE"], params=params)
+    else:
+        population = Population(0, params=params)
+        for chromosome, unplaced, _ in members:
+            population.add_schedule(_from_worker(chromosome, unplaced, params))
+    population.sort()
+
+    ga = GeneticAlgorithm(deadline=deadline, params=params)
+    gen = 0
+    while gen < generations and population.get_fitness_values()[0] < threshold:
+        if deadline is not None and monotonic() >= deadline:
+            break
+        population = ga.evolve(population)
+        population.sort()
+        gen += 1
 
+    fitness = population.get_fitness_values()
+    return [(s.get_chromosome(), s._unplaced, float(f))
+            for s, f in zip(population.get_schedules(), fitness)], gen
 
-# ---------------- TIMETABLE VIEW ----------------
 
-def timetable(request):
-    global data
-    data = Data()
+# ---------------- WORKER POOL ----------------
 
-    # --- Run GA to get best schedule ---
-    population = Population(POPULATION_SIZE)
-    ga = GeneticAlgorithm()
+def worker_pool(workers=None):
+    """
+    A process pool for Population and GeneticAlgorithm, or None when
+    ``workers`` (default: settings.TTGEN_WORKERS) is 1 or less.
 
-    MAX_GEN = 200
-    FITNESS_THRESHOLD = 0.90
+    Each worker receives the current snapshot once, when it starts:
+    forked workers inherit it, others unpickle it from the initializer's
+    arguments. Tasks then carry only chromosomes.
+    """
+    if workers is None:
+        workers = getattr(settings, "TTGEN_WORKERS", 1)
+    if workers <= 1:
+        return None
 
-    population.get_schedules().sort(key=lambda s: s.get_fitness(), reverse=True)
-    gen = 0
+    # Forked workers already have Django set up; spawned ones would have
+    # to import it from scratch before they could unpickle anything.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(workers, mp_context=context,
+                               initializer=_init_worker, initargs=(data,))
 
-    while True:
-        best = population.get_schedules()[0].get_fitness()
-        print(f"Generation {gen:03d} | Best fitness = {best:.4f}")
 
-        if best >= FITNESS_THRESHOLD or gen >= MAX_GEN:
-            break
+def _init_worker(snapshot):
+    global data
+    data = snapshot
+    # Forked workers would otherwise all share the parent's random state.
+    rnd.seed()
+
+
+def _build_chromosome(task):
+    strategy, params = task
+    schedule = Schedule(params).initialize(strategy)
+    return schedule.get_chromosome(), schedule._unplaced
+
+
+def _breed(task):
+    c1, c2, params = task
+    ga = GeneticAlgorithm(params=params)
+    child = ga._mutate(ga._cross(c1, c2))
+    return child.get_chromosome(), child._unplaced
+
+
+def _from_worker(chromosome, unplaced, params=None):
+    schedule = Schedule.from_chromosome(*chromosome, params=params)
+    schedule._unplaced = unplaced
+    return schedule
+
+
+# ---------------- GA RUN ----------------
+
+def ga_parameters(overrides=None):
+    """
+    Every setting that changes what a run produces: the module settings,
+    with ``overrides`` (a dict of some of them) in place of theirs.
+    """
+    params = {
+        "SEED": SEED,
+        "MAX_GEN": MAX_GEN,
+        "FITNESS_THRESHOLD": FITNESS_THRESHOLD,
+        "UNPLACED_PENALTY": UNPLACED_PENALTY,
+        "POPULATION_SIZE": POPULATION_SIZE,
+        "NUMB_OF_ELITE_SCHEDULES": NUMB_OF_ELITE_SCHEDULES,
+        "TOURNAMENT_SELECTION_SIZE": TOURNAMENT_SELECTION_SIZE,
+        "MUTATION_RATES": MUTATION_RATES,
+        "ISLANDS": ISLANDS,
+        "MIGRATION_INTERVAL": MIGRATION_INTERVAL,
+        "MIGRANTS": MIGRANTS,
+        "CROSSOVER_METHOD": CROSSOVER_METHOD,
+        "REPAIR_CHILDREN": REPAIR_CHILDREN,
+        "CONSTRUCTION_STRATEGY": CONSTRUCTION_STRATEGY,
+        "MAX_RANDOM_ATTEMPTS": MAX_RANDOM_ATTEMPTS,
+        "FREE_SAMPLE_DRAWS": FREE_SAMPLE_DRAWS,
+        "WARM_START_FRACTION": WARM_START_FRACTION,
+        "WARM_START_PERTURBATION": WARM_START_PERTURBATION,
+        "LOCAL_SEARCH": LOCAL_SEARCH,
+        "LOCAL_SEARCH_STAGE": LOCAL_SEARCH_STAGE,
+        "LOCAL_SEARCH_BUDGET": LOCAL_SEARCH_BUDGET,
+        "ANNEAL_TEMPERATURE": ANNEAL_TEMPERATURE,
+        "ANNEAL_COOLING": ANNEAL_COOLING,
+        "TABU_TENURE": TABU_TENURE,
+    }
+    if overrides:
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"unknown GA parameters: {', '.join(sorted(unknown))}")
+        params.update(overrides)
+    return params
+
+
+def fingerprint(problem_hash, engine=None):
+    """Cache key of a solution: the problem hash plus the solver engine and its parameters."""
+    engine = solvers.get_engine(engine)
+    params = json.dumps(engine.parameters(), sort_keys=True)
+    return hashlib.sha256(f"{problem_hash}:{engine.name}:{params}".encode()).hexdigest()
+
+
+def current_fingerprint(engine=None):
+    """
+    fingerprint() of the data in the database. The problem hash is kept
+    in the cache until a model signal clears it, so repeated calls with
+    unchanged data issue no queries.
+    """
+    problem_hash = cache.get(PROBLEM_HASH_CACHE_KEY)
+    if problem_hash is None:
+        problem_hash = ProblemSnapshot.load().problem_hash
+        cache.set(PROBLEM_HASH_CACHE_KEY, problem_hash, None)
+    return fingerprint(problem_hash, engine)
+
+
+def polish(schedule, deadline=None, params=None):
+    """Local search on a run's final schedule, when LOCAL_SEARCH_STAGE is "polish"."""
+    params = ga_parameters(params)
+    if params["LOCAL_SEARCH"] and params["LOCAL_SEARCH_STAGE"] == "polish":
+        return LocalSearch(params=params).run(schedule, deadline)
+    return schedule
+
+
+def generate_schedule(report=None, warm_start=None, deadline=None, params=None):
+    """
+    Evolve a timetable for the current snapshot and return the best
+    schedule. ``report(gen, best)`` is called as the run progresses,
+    ``warm_start`` (a schedule) seeds part of the initial population, and
+    no generation or local search step is started after ``deadline`` (a
+    time.monotonic() value): the run then returns the best schedule so far.
+    ``params`` overrides settings for this run only, as in ga_parameters().
+    """
+    p = ga_parameters(params)
+    if p["SEED"] is not None:
+        rnd.seed(p["SEED"])
+    pool = worker_pool()
+    try:
+        if p["ISLANDS"] > 1:
+            populations = None
+            if warm_start is not None:
+                populations = [Population(p["POPULATION_SIZE"], pool, warm_start, params=p)
+                               for _ in range(p["ISLANDS"])]
+            best_schedule, _ = IslandModel(pool, params=p).run(
+                p["MAX_GEN"], p["FITNESS_THRESHOLD"], populations, report, deadline)
+            return polish(best_schedule, deadline, p)
+
+        population = Population(p["POPULATION_SIZE"], pool, warm_start, params=p)
+        ga = GeneticAlgorithm(pool, deadline, p)
+
+        population.sort()
+        gen = 0
+
+        while True:
+            best = population.get_fitness_values()[0]
+            logger.info("Generation %03d | Best fitness = %.4f", gen, best)
+            if report is not None:
+                report(gen, population.get_schedules()[0])
+
+            if best >= p["FITNESS_THRESHOLD"] or gen >= p["MAX_GEN"]:
+                break
+            if deadline is not None and monotonic() >= deadline:
+                break
+
+            population = ga.evolve(population)
+            population.sort()
+            gen += 1
+
+        return polish(population.get_schedules()[0], deadline, p)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-        population = ga.evolve(population)
-        population.get_schedules().sort(key=lambda s: s.get_fitness(), reverse=True)
-        gen += 1
 
-    best_schedule = population.get_schedules()[0]
+# ---------------- TIMETABLE VIEW ----------------
 
-    # ---- Time / days ----
+SLOT_LABELS = {
+    "1": "8:30 - 9:30",
+    "2": "9:30 - 10:30",
+    "3": "10:30 - 11:30",
+    "4": "11:30 - 12:30",
+    "5": "12:30 - 1:30",   # Lunch
+    "6": "1:30 - 2:30",
+    "7": "2:30 - 3:30",
+    "8": "3:30 - 4:30",
+    "9": "4:30 - 5:30",
+}
+
+
+def index_meetings(all_labs, all_classes, owners):
+    """
+    Index the meetings in one pass. ``owners`` maps a view name to a
+    function giving a meeting's owner (its section, instructor, ...);
+    the result maps each view name to {owner: (labs_at, classes_at)},
+    both keyed by (day, slot). A lab sits at its start slot (the first
+    one wins); classes keep their schedule order.
+    """
+    index = {name: {} for name in owners}
+    for lab in all_labs:
+        if lab.meeting_times:
+            start = lab.meeting_times[0]
+            at = (start.day, int(start.time))
+            for name, owner in owners.items():
+                labs_at, _ = index[name].setdefault(owner(lab), ({}, {}))
+                labs_at.setdefault(at, lab)
+    for cls in all_classes:
+        if cls.meeting_time is not None:
+            at = (cls.meeting_time.day, int(cls.meeting_time.time))
+            for name, owner in owners.items():
+                _, classes_at = index[name].setdefault(owner(cls), ({}, {}))
+                classes_at.setdefault(at, []).append(cls)
+    return index
+
+
+def build_grid(labs_at, classes_at):
+    """One owner's week as rows of cells, from its index_meetings() entry."""
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    rows = []
+
+    for day in days:
+        cells = []
+        slot = 1
+        while slot <= 9:
+            # Slot 5 = lunch
+            if slot == 5:
+                cells.append({
+                    "type": "lunch",
+                    "colspan": 1,
+                    "lab": None,
+                    "classes": [],
+                })
+                slot += 1
+                continue
 
-    SLOT_LABELS = {
-        "1": "8:30 - 9:30",
-        "2": "9:30 - 10:30",
-        "3": "10:30 - 11:30",
-        "4": "11:30 - 12:30",
-        "5": "12:30 - 1:30",   # Lunch
-        "6": "1:30 - 2:30",
-        "7": "2:30 - 3:30",
-        "8": "3:30 - 4:30",
-        "9": "4:30 - 5:30",
-    }
+            # Check if a LAB starts here (strict: only slot 1 or 6 allowed, GA already enforces)
+            lab_here = labs_at.get((day, slot))
+
+            if lab_here is not None:
+                # One big 4-slot rectangle: colspan=4
+                cells.append({
+                    "type": "lab",
+                    "colspan": 4,
+                    "lab": lab_here,
+                    "classes": [],
+                })
+                slot += 4
+                continue
+
+            # No lab starting here → check for classes at this slot
+            classes_here = classes_at.get((day, slot), [])
+
+            if classes_here:
+                cells.append({
+                    "type": "class",
+                    "colspan": 1,
+                    "lab": None,
+                    "classes": classes_here,
+                })
+            else:
+                cells.append({
+                    "type": "empty",
+                    "colspan": 1,
+                    "lab": None,
+                    "classes": [],
+                })
+
+            slot += 1
+
+        rows.append({
+            "day": day,
+            "cells": cells,
+        })
+
+    return rows
 
-    sections = list(Section.objects.all())
-    all_labs = best_schedule.get_labs()
-    all_classes = best_schedule.get_classes()
 
+def build_tables(sections, all_labs, all_classes):
     # ---------------------------
     # Build a ready-to-render grid
     # ---------------------------
     # tables = [ { "section": <Section>, "rows": [ { "day": "Monday", "cells": [ {...}, ... ] }, ... ] } ]
-    tables = []
-
-    for section in sections:
-        section_rows = []
-
-        for day in days:
-            cells = []
-            slot = 1
-            while slot <= 9:
-                # Slot 5 = lunch
-                if slot == 5:
-                    cells.append({
-                        "type": "lunch",
-                        "colspan": 1,
-                        "lab": None,
-                        "classes": [],
-                    })
-                    slot += 1
-                    continue
+    index = index_meetings(all_labs, all_classes, {"section": lambda m: m.section})["section"]
+    return [{"section": section, "rows": build_grid(*index.get(section.section_id, ({}, {})))}
+            for section in sections]
 
-                # Check if a LAB starts here (strict: only slot 1 or 6 allowed, GA already enforces)
-                lab_here = None
-                for lab in all_labs:
-                    if (
-                        lab.section == section.section_id and
-                        lab.meeting_times and
-                        lab.meeting_times[0].day == day and
-                        int(lab.meeting_times[0].time) == slot
-                    ):
-                        lab_here = lab
-                        break
-
-                if lab_here is not None:
-                    # One big 4-slot rectangle: colspan=4
-                    cells.append({
-                        "type": "lab",
-                        "colspan": 4,
-                        "lab": lab_here,
-                        "classes": [],
-                    })
-                    slot += 4
-                    continue
 
-                # No lab starting here → check for classes at this slot
-                classes_here = [
-                    cls for cls in all_classes
-                    if (
-                        cls.section == section.section_id and
-                        cls.meeting_time is not None and
-                        cls.meeting_time.day == day and
-                        int(cls.meeting_time.time) == slot
-                    )
-                ]
-
-                if classes_here:
-                    cells.append({
-                        "type": "class",
-                        "colspan": 1,
-                        "lab": None,
-                        "classes": classes_here,
-                    })
-                else:
-                    cells.append({
-                        "type": "empty",
-                        "colspan": 1,
-                        "lab": None,
-                        "classes": [],
-                    })
+def timetable_context(timetable, view="section"):
+    return {
+        "timetable": timetable,
+        "tables": timetable_views(timetable)[view],
+        "SLOT_LABELS": SLOT_LABELS,
+    }
 
-                slot += 1
 
-            section_rows.append({
-                "day": day,
-                "cells": cells,
-            })
+def requested_timetable(request):
+    """The version asked for with ?version=, else the latest (or None)."""
+    if 'version' in request.GET:
+        try:
+            version = int(request.GET['version'])
+        except ValueError:
+            raise Http404("version must be a number")
+        return get_object_or_404(GeneratedTimetable, version=version)
+    return latest_timetable()
 
-        tables.append({
-            "section": section,
-            "rows": section_rows,
-        })
 
-    return render(request, "gentimetable.html", {
-        "tables": tables,
-        "SLOT_LABELS": SLOT_LABELS,
+def timetable(request):
+    """A stored timetable: the given version, or the latest one."""
+    timetable = requested_timetable(request)
+    if timetable is None:
+        return redirect('generate')
+    return render(request, "gentimetable.html", timetable_context(timetable))
+
+
+def timetable_view(request, view, template, pk=None):
+    """One of the timetable_views() of a stored version, optionally for one owner."""
+    timetable = requested_timetable(request)
+    if timetable is None:
+        return redirect('generate')
+
+    context = timetable_context(timetable, view)
+    if pk is not None:
+        context["tables"] = [t for t in context["tables"] if str(t["owner"].pk) == str(pk)]
+        if not context["tables"]:
+            raise Http404
+    return render(request, template, context)
+
+
+def section_timetable(request, pk=None):
+    return timetable_view(request, "section", "gentimetable.html", pk)
+
+
+def instructor_timetable(request, pk=None):
+    return timetable_view(request, "instructor", "timetable_instructors.html", pk)
+
+
+def room_timetable(request, pk=None):
+    return timetable_view(request, "room", "timetable_rooms.html", pk)
+
+
+def department_timetable(request, pk=None):
+    return timetable_view(request, "department", "timetable_departments.html", pk)
+
+
+# ---------------- STORED TIMETABLES ----------------
+
+# Times save_timetable() tries for a version number before giving up.
+SAVE_VERSION_ATTEMPTS = 5
+
+
+def _next_version():
+    return (GeneratedTimetable.objects.aggregate(Max('version'))['version__max'] or 0) + 1
+
+
+def save_timetable(schedule, fingerprint=""):
+    """
+    Store ``schedule`` as the next GeneratedTimetable version, with one
+    ScheduledMeeting per placed class or lab, in a single transaction.
+
+    Two jobs finishing together can both read the same latest version;
+    the one whose insert then breaks the unique version rolls back to a
+    savepoint and takes the next number.
+    """
+    d = schedule._data
+    unplaced = [f"{d.describe_gene(g)}: {reason}" for g, reason in schedule.get_unplaced()]
+
+    with transaction.atomic():
+        for attempt in range(SAVE_VERSION_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    timetable = GeneratedTimetable.objects.create(
+                        version=_next_version(),
+                        fingerprint=fingerprint,
+                        best_fitness=schedule.get_fitness(),
+                        conflicts=schedule.get_numb_of_conflicts(),
+                        unplaced=json.dumps(unplaced),
+                    )
+                break
+            except IntegrityError:
+                if attempt == SAVE_VERSION_ATTEMPTS - 1:
+                    raise
+
+        ScheduledMeeting.objects.bulk_create([
+            ScheduledMeeting(
+                timetable=timetable,
+                section_id=section,
+                course_id=course,
+                room_id=room,
+                instructor_id=instructor,
+                meeting_time_id=meeting_time,
+                duration=LAB_DURATION if is_lab else 1,
+                is_lab=is_lab,
+            )
+            for section, course, room, instructor, meeting_time, is_lab in schedule.get_meetings()
+        ])
+
+    return timetable
+
+
+def latest_timetable():
+    return GeneratedTimetable.objects.order_by('-version').first()
+
+
+def repair_timetable(timetable):
+    """
+    Carry ``timetable`` over to the current data (loaded into the
+    snapshot): keep every meeting that is still valid and place only the
+    genes that are not, by local search. Returns the repaired schedule,
+    which also serves as a warm start for the GA.
+    """
+    meetings = timetable.meetings.values_list(
+        'section', 'course', 'room', 'instructor', 'meeting_time', 'is_lab').order_by('pk')
+    schedule, invalid = Schedule.from_meetings(meetings)
+    for g in invalid:
+        schedule.relocate(g)
+    logger.info("Repaired v%s: %d genes re-placed, %d unplaced",
+                timetable.version, len(invalid), len(schedule.get_unplaced()))
+    return schedule
+
+
+def cached_timetable(fingerprint):
+    """The latest version solved for ``fingerprint``, if any."""
+    return GeneratedTimetable.objects.filter(fingerprint=fingerprint).order_by('-version').first()
+
+
+def load_meetings(timetable):
+    """
+    (labs, classes) of a stored version as Lab/Class objects, in two
+    queries. Meetings that lost their room, instructor or time to a
+    deletion are left out.
+    """
+    meetings = timetable.meetings.select_related('course', 'room', 'instructor', 'meeting_time')
+    by_day_time = {(mt.day, mt.time): mt for mt in MeetingTime.objects.all()}
+
+    labs, classes = [], []
+    for m in meetings:
+        if m.room is None or m.instructor is None or m.meeting_time is None:
+            continue
+        start = m.meeting_time
+        if m.is_lab:
+            gene = Lab(m.pk, None, m.section_id, m.course)
+            block = [by_day_time.get((start.day, str(int(start.time) + k))) for k in range(m.duration)]
+            gene.set_meetingTimes([mt for mt in block if mt is not None])
+            labs.append(gene)
+        else:
+            gene = Class(m.pk, None, m.section_id, m.course)
+            gene.set_meetingTime(start)
+            classes.append(gene)
+        gene.set_room(m.room)
+        gene.set_instructor(m.instructor)
+    return labs, classes
+
+
+def load_tables(timetable):
+    """build_tables() for a stored version."""
+    return timetable_views(timetable)["section"]
+
+
+# How long a version's grids stay cached, in seconds.
+TIMETABLE_VIEWS_TIMEOUT = 24 * 60 * 60
+
+
+def timetable_views(timetable):
+    """
+    A stored version's grids by section, instructor, room and department,
+    built from one pass over its meetings and cached with the version.
+    Each view is a list of tables with an "owner", a "title" and "rows";
+    a department's table holds its sections' tables instead of rows.
+
+    As in pdf.cache_dir(), the key includes the version's creation time,
+    so a pk and version number reused after a database reset misses.
+    """
+    key = (f"ttgen:timetable-views:{timetable.pk}:{timetable.version}:"
+           f"{timetable.created_at:%Y%m%d%H%M%S%f}")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    labs, classes = load_meetings(timetable)
+    index = index_meetings(labs, classes, {
+        "section": lambda m: m.section,
+        "instructor": lambda m: m.instructor.pk,
+        "room": lambda m: m.room.pk,
     })
 
+    def tables(view, owners, title):
+        return [{"owner": owner, "title": title(owner),
+                 "rows": build_grid(*index[view].get(owner.pk, ({}, {})))}
+                for owner in owners]
+
+    sections = tables("section", Section.objects.select_related('department'),
+                      lambda s: f"{s.section_id} ({s.department.dept_name})")
+    for table in sections:
+        table["section"] = table["owner"]
+
+    by_dept = {}
+    for table in sections:
+        by_dept.setdefault(table["owner"].department_id, []).append(table)
+
+    result = {
+        "section": sections,
+        "instructor": tables("instructor", Instructor.objects.all(), lambda i: f"{i.uid} {i.name}"),
+        "room": tables("room", Room.objects.all(), str),
+        "department": [{"owner": dept, "title": dept.dept_name, "tables": by_dept.get(dept.pk, [])}
+                       for dept in Department.objects.all()],
+    }
+    cache.set(key, result, TIMETABLE_VIEWS_TIMEOUT)
+    return result
+
+
+# ---------------- GENERATION JOBS ----------------
+
+def job_json(job):
+    return {
+        "id": job.pk,
+        "mode": job.mode,
+        "engine": job.engine,
+        "status": job.status,
+        "generation": job.generation,
+        "best_fitness": job.best_fitness,
+        "conflicts": job.conflicts,
+        "time_limit": job.time_limit,
+        "stopped_by_deadline": job.stopped_by_deadline,
+        "error": job.error,
+        "from_cache": job.from_cache,
+        "status_url": reverse('jobstatus', args=[job.pk]),
+        "result_url": reverse('jobresult', args=[job.pk]),
+        "timetable_url": (f"{reverse('timetable')}?version={job.timetable.version}"
+                          if job.timetable else None),
+    }
+
+
+@login_required
+@require_POST
+def start_job(request):
+    # ?engine= (POSTed) picks the solver engine for this run, and
+    # ?time_limit= the seconds it may take.
+    engine = request.POST.get('engine') or None
+    if engine is not None and engine not in solvers.ENGINES:
+        return JsonResponse({"error": f"unknown engine {engine!r}",
+                             "engines": sorted(solvers.ENGINES)}, status=400)
+    time_limit = request.POST.get('time_limit') or None
+    if time_limit is not None:
+        try:
+            time_limit = float(time_limit)
+        except ValueError:
+            time_limit = -1
+        if not 0 < time_limit < math.inf:
+            return JsonResponse({"error": "time_limit must be a positive number of seconds"},
+                                status=400)
+    job = jobs.start_job(engine=engine, time_limit=time_limit)
+    return JsonResponse(job_json(job), status=202)
+
+
+@login_required
+@require_POST
+def start_repair(request):
+    job = jobs.start_repair()
+    if job is None:
+        return JsonResponse({"error": "no timetable to repair yet"}, status=409)
+    return JsonResponse(job_json(job), status=202)
+
+
+def job_status(request, pk):
+    return JsonResponse(job_json(get_object_or_404(GenerationJob, pk=pk)))
+
+
+def job_result(request, pk):
+    job = get_object_or_404(GenerationJob, pk=pk)
+    if job.timetable is None:
+        return JsonResponse(job_json(job), status=409)
+
+    timetable = job.timetable
+    meetings = timetable.meetings.values(
+        'section', 'course', 'room', 'instructor', 'meeting_time', 'duration', 'is_lab')
+    return JsonResponse(dict(
+        job_json(job),
+        version=timetable.version,
+        meetings=list(meetings),
+        unplaced=json.loads(timetable.unplaced),
+    ))
+
 
 
 
@@ -567,6 +2035,7 @@ def inst_list_view(request):
 def delete_instructor(request, pk):
     if request.method == 'POST':
         Instructor.objects.filter(pk=pk).delete()
+        jobs.start_repair()
         return redirect('editinstructor')
 
 
@@ -582,7 +2051,7 @@ def addRooms(request):
 @login_required
 def room_list(request):
     return render(request, 'roomslist.html', {
-        'rooms': Room.objects.all()
+        'rooms': Room.objects.select_related('department')
     })
 
 
@@ -590,6 +2059,7 @@ def room_list(request):
 def delete_room(request, pk):
     if request.method == 'POST':
         Room.objects.filter(pk=pk).delete()
+        jobs.start_repair()
         return redirect('editrooms')
 
 
@@ -613,6 +2083,7 @@ def meeting_list_view(request):
 def delete_meeting_time(request, pk):
     if request.method == 'POST':
         MeetingTime.objects.filter(pk=pk).delete()
+        jobs.start_repair()
         return redirect('editmeetingtime')
 
 
@@ -667,6 +2138,78 @@ def generate(request):
     return render(request, 'generate.html')
 
 
+def export_timetable(request, fmt):
+    """
+    A stored version as CSV, JSON Lines or iCalendar, streamed as it is
+    read. ?section=, ?instructor= and ?room= (each repeatable) filter the
+    meetings; ?start=YYYY-MM-DD sets the first week of an .ics export.
+    """
+    if fmt not in exports.FORMATS:
+        raise Http404
+    timetable = requested_timetable(request)
+    if timetable is None:
+        return redirect('generate')
+
+    # Checked here: inside the generator a bad id would only fail after
+    # the response headers had gone out.
+    try:
+        filters = {
+            "sections": request.GET.getlist('section'),
+            "instructors": [int(pk) for pk in request.GET.getlist('instructor')],
+            "rooms": [int(pk) for pk in request.GET.getlist('room')],
+        }
+    except ValueError:
+        return HttpResponse("instructor and room must be numeric ids", status=400)
+    if fmt == "ics" and 'start' in request.GET:
+        try:
+            filters["week_start"] = date.fromisoformat(request.GET['start'])
+        except ValueError:
+            return HttpResponse("start must be a date (YYYY-MM-DD)", status=400)
+
+    generator, content_type = exports.FORMATS[fmt]
+    response = StreamingHttpResponse(generator(timetable, **filters), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="timetable-v{timetable.version}.{fmt}"'
+    return response
+
+
 class Pdf(View):
     def get(self, request):
-        return Render.render('gentimetable.html', {'request': request})
+        timetable = requested_timetable(request)
+        if timetable is None:
+            return redirect('generate')
+        try:
+            path = pdf.timetable_pdf(timetable)
+        except pdf.PdfError:
+            return HttpResponse("Error Rendering PDF", status=400)
+        return FileResponse(open(path, 'rb'), content_type='application/pdf')
+
+
+def section_pdf(request, pk):
+    """One section's PDF of a stored version, from the PDF cache."""
+    timetable = requested_timetable(request)
+    if timetable is None:
+        return redirect('generate')
+    try:
+        paths = pdf.section_pdfs(timetable, [pk])
+    except pdf.PdfError:
+        return HttpResponse("Error Rendering PDF", status=400)
+    if not paths:
+        raise Http404
+    (section_id, path), = paths.items()
+    return FileResponse(open(path, 'rb'), as_attachment=True,
+                        filename=pdf.section_filename(section_id), content_type='application/pdf')
+
+
+def pdf_archive(request):
+    """Every section's PDF of a stored version as a ZIP streamed from the cache."""
+    timetable = requested_timetable(request)
+    if timetable is None:
+        return redirect('generate')
+    try:
+        paths = pdf.section_pdfs(timetable)
+    except pdf.PdfError:
+        return HttpResponse("Error Rendering PDF", status=400)
+    files = [(pdf.section_filename(section_id), path) for section_id, path in paths.items()]
+    response = StreamingHttpResponse(pdf.stream_zip(files), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="timetable-v{timetable.version}.zip"'
+    return response